@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Run the benchmarks in benchmarks/suite.py with 1, 3 and 10 translation
+languages and compare them with a stored baseline.
+
+    python bench.py                      # run and compare with the baseline
+    python bench.py --save               # store the results as the baseline
+    python bench.py --check              # exit with 1 on regressions
+    python bench.py --languages 3 --case get_details
+
+Baselines are JSON files in benchmarks/baselines. Timings are compared by
+their median with --tolerance, query counts exactly.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASELINES = os.path.join(os.path.dirname(__file__), "benchmarks", "baselines")
+LANGUAGES = ("en", "ru", "es", "de", "fr", "it", "pt", "ja", "ko", "ar")
+
+
+def run_worker(languages: int, cases: list):
+    from boot_django import boot_django
+
+    boot_django(
+        MODELTRANSLATION_LANGUAGES=LANGUAGES[:languages],
+        # Create the tables from the models, whatever the languages.
+        MIGRATION_MODULES={"places": None},
+        DEBUG=False,
+    )
+    from django.db import connection
+
+    from benchmarks import suite
+
+    connection.creation.create_test_db(verbosity=0)
+    json.dump(suite.run(cases), sys.stdout)
+
+
+def run_suite(languages: list, cases: list) -> dict:
+    results = {}
+    for count in languages:
+        command = [
+            sys.executable,
+            __file__,
+            "--worker",
+            f"--languages={count}",
+        ]
+        command += [f"--case={name}" for name in cases]
+        output = subprocess.run(
+            command, check=True, stdout=subprocess.PIPE, text=True
+        ).stdout
+        for name, result in json.loads(output).items():
+            results[f"{name}[languages={count}]"] = result
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, "
+                f"baseline {base['queries']}"
+            )
+        if result["p50_us"] > base["p50_us"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p50 {result['p50_us']}µs, "
+                f"baseline {base['p50_us']}µs"
+            )
+    return regressions
+
+
+def report(results: dict, baseline: dict):
+    columns = ("p50_us", "p90_us", "p99_us", "queries", "peak_kib")
+    print(f"{'benchmark':<42}" + "".join(f"{c:>11}" for c in columns))
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = f"{name:<42}" + "".join(f"{result[c]:>11}" for c in columns)
+        if base:
+            change = result["p50_us"] / base["p50_us"] - 1
+            line += f"   p50 {change:+.0%} vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--languages", type=int, action="append", choices=(1, 3, 10)
+    )
+    parser.add_argument(
+        "--case",
+        action="append",
+        default=[],
+        help="Run the cases whose name starts with this.",
+    )
+    parser.add_argument("--baseline", default="baseline")
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--worker", action="store_true", help=argparse.SUPPRESS
+    )
+    options = parser.parse_args()
+
+    if options.worker:
+        run_worker(options.languages[0], options.case)
+        return
+
+    path = os.path.join(BASELINES, f"{options.baseline}.json")
+    results = run_suite(options.languages or [1, 3, 10], options.case)
+    baseline = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report(results, baseline)
+    if options.save:
+        os.makedirs(BASELINES, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved {path}")
+        return
+
+    regressions = compare(results, baseline, options.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if options.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare the cache serializers on sample Place Details responses.
+
+    python -m benchmarks.bench_codecs [--fields FIELD,...]
+
+Reports the mean stored size per entry and the encode/decode time per
+entry for every codec and compression combination. ``--fields`` trims the
+responses to a Place Details field mask first.
+"""
+import argparse
+import timeit
+
+from benchmarks.fixtures import place_response
+from places.codecs import Serializer
+
+LANGUAGES = ("en", "ru", "es")
+
+VARIANTS = (
+    ("pickle", None),
+    ("pickle", "zlib"),
+    ("pickle", "lzma"),
+    ("json", None),
+    ("json", "zlib"),
+    ("json", "lzma"),
+)
+
+
+def sample_responses(count: int = 100, fields: list = None) -> list:
+    return [
+        place_response(f"place-{n}", LANGUAGES[n % len(LANGUAGES)], fields)
+        for n in range(count)
+    ]
+
+
+def measure(serializer: Serializer, responses: list, repeat: int = 5):
+    encoded = [serializer.dumps(response) for response in responses]
+    size = sum(len(data) for data in encoded) / len(encoded)
+    encode = min(
+        timeit.repeat(
+            lambda: [serializer.dumps(r) for r in responses],
+            number=1,
+            repeat=repeat,
+        )
+    )
+    decode = min(
+        timeit.repeat(
+            lambda: [serializer.loads(d) for d in encoded],
+            number=1,
+            repeat=repeat,
+        )
+    )
+    count = len(responses)
+    return size, encode / count * 1e6, decode / count * 1e6
+
+
+def run(responses: list = None) -> list:
+    responses = responses or sample_responses()
+    rows = []
+    for codec, compression in VARIANTS:
+        serializer = Serializer(codec, compression)
+        size, encode, decode = measure(serializer, responses)
+        rows.append(
+            {
+                "codec": codec,
+                "compression": compression or "-",
+                "bytes": round(size),
+                "encode_us": round(encode, 1),
+                "decode_us": round(decode, 1),
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--fields", type=lambda value: value.split(","), default=None
+    )
+    options = parser.parse_args()
+
+    print(
+        f"{'codec':<8}{'compression':<13}{'bytes/entry':>12}"
+        f"{'encode µs':>12}{'decode µs':>12}"
+    )
+    for row in run(sample_responses(fields=options.fields)):
+        print(
+            f"{row['codec']:<8}{row['compression']:<13}{row['bytes']:>12}"
+            f"{row['encode_us']:>12}{row['decode_us']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Synthetic but realistically shaped Google Places responses.
+
+The shapes and sizes follow real Place Details responses: a dozen address
+components, photos with long references, opening hours and a handful of
+reviews. Values are derived from the place_id, so the same arguments
+always give the same response.
+"""
+import random
+import string
+
+NAMES = {
+    "en": ("Main Street", "Springfield", "Illinois", "Sangamon County"),
+    "ru": ("Главная улица", "Спрингфилд", "Иллинойс", "округ Сангамон"),
+    "es": ("Calle Mayor", "Springfield", "Illinois", "Condado de Sangamon"),
+}
+
+WEEKDAYS = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        for _ in range(words)
+    )
+
+
+def _component(long_name: str, short_name: str, *types: str) -> dict:
+    return {"long_name": long_name, "short_name": short_name, "types": types}
+
+
+def address_components(place_id: str, language: str = "en") -> list:
+    rng = random.Random(place_id)
+    route, locality, state, county = NAMES.get(language, NAMES["en"])
+    number = str(rng.randint(1, 999))
+    return [
+        _component(number, number, "street_number"),
+        _component(route, route, "route"),
+        _component("Downtown", "Downtown", "neighborhood", "political"),
+        _component(locality, locality, "locality", "political"),
+        _component(county, county, "administrative_area_level_2", "political"),
+        _component(state, "IL", "administrative_area_level_1", "political"),
+        _component("United States", "US", "country", "political"),
+        _component("62701", "62701", "postal_code"),
+    ]
+
+
+# Field mask names that differ from the response keys they select.
+FIELD_KEYS = {
+    "address_component": "address_components",
+    "photo": "photos",
+    "review": "reviews",
+    "type": "types",
+}
+
+
+def place_response(
+    place_id: str, language: str = "en", fields: list = None
+) -> dict:
+    rng = random.Random(f"{place_id}:{language}")
+    components = address_components(place_id, language)
+    number, route, _, locality = (c["long_name"] for c in components[:4])
+    formatted_address = (
+        f"{number} {route}, {locality}, IL 62701, {components[6]['long_name']}"
+    )
+    lat = 39.78 + rng.random() / 100
+    lng = -89.65 + rng.random() / 100
+    result = {
+        "address_components": components,
+        "adr_address": f'<span class="street-address">{formatted_address}'
+        "</span>",
+        "business_status": "OPERATIONAL",
+        "formatted_address": formatted_address,
+        "formatted_phone_number": "(217) 555-0100",
+        "geometry": {
+            "location": {"lat": lat, "lng": lng},
+            "viewport": {
+                "northeast": {"lat": lat + 0.0013, "lng": lng + 0.0013},
+                "southwest": {"lat": lat - 0.0013, "lng": lng - 0.0013},
+            },
+        },
+        "icon": "https://maps.gstatic.com/mapfiles/place_api/icons/v1/png_"
+        "71/generic_business-71.png",
+        "international_phone_number": "+1 217-555-0100",
+        "name": _text(rng, 3).title(),
+        "opening_hours": {
+            "open_now": True,
+            "periods": [
+                {
+                    "close": {"day": day, "time": "1800"},
+                    "open": {"day": day, "time": "0900"},
+                }
+                for day in range(7)
+            ],
+            "weekday_text": [f"{day}: 9:00 AM – 6:00 PM" for day in WEEKDAYS],
+        },
+        "photos": [
+            {
+                "height": 3024,
+                "html_attributions": [
+                    '<a href="https://maps.google.com/maps/contrib/'
+                    f'{rng.getrandbits(64)}">{_text(rng, 2).title()}</a>'
+                ],
+                "photo_reference": "".join(
+                    rng.choices(
+                        string.ascii_letters + string.digits + "-_", k=400
+                    )
+                ),
+                "width": 4032,
+            }
+            for _ in range(10)
+        ],
+        "place_id": place_id,
+        "plus_code": {
+            "compound_code": f"QCJ2+7Q {locality}, Illinois",
+            "global_code": "86GGQCJ2+7Q",
+        },
+        "rating": round(rng.uniform(1, 5), 1),
+        "reference": place_id,
+        "reviews": [
+            {
+                "author_name": _text(rng, 2).title(),
+                "author_url": "https://www.google.com/maps/contrib/"
+                f"{rng.getrandbits(64)}/reviews",
+                "language": language,
+                "profile_photo_url": "https://lh3.googleusercontent.com/a/"
+                + "".join(rng.choices(string.ascii_letters, k=60)),
+                "rating": rng.randint(1, 5),
+                "relative_time_description": "a month ago",
+                "text": _text(rng, rng.randint(20, 120)),
+                "time": 1600000000 + rng.randint(0, 10**8),
+            }
+            for _ in range(5)
+        ],
+        "types": ["point_of_interest", "establishment"],
+        "url": f"https://maps.google.com/?cid={rng.getrandbits(64)}",
+        "user_ratings_total": rng.randint(1, 5000),
+        "utc_offset": -300,
+        "vicinity": f"{route}, {locality}",
+        "website": "https://example.com/",
+    }
+    if fields is not None:
+        roots = {field.split("/")[0] for field in fields}
+        roots = {FIELD_KEYS.get(root, root) for root in roots}
+        result = {k: v for k, v in result.items() if k in roots}
+    return {"html_attributions": [], "result": result, "status": "OK"}
+
+
+def find_place_response(address: str) -> dict:
+    if not address.strip():
+        return {"candidates": [], "status": "ZERO_RESULTS"}
+    rng = random.Random(address)
+    place_id = "ChIJ" + "".join(
+        rng.choices(string.ascii_letters + string.digits + "-_", k=23)
+    )
+    return {"candidates": [{"place_id": place_id}], "status": "OK"}
+
+
+def respond(name: str, arguments: dict) -> dict:
+    """
+    Fallback for ``places.replay.ReplayClient`` answering ``find_place``
+    and ``place`` calls with the synthetic responses above.
+    """
+    if name == "find_place":
+        return find_place_response(arguments["input"])
+    if name == "place":
+        return place_response(
+            arguments["place_id"],
+            arguments.get("language", "en"),
+            arguments.get("fields"),
+        )
+    raise LookupError(f"No synthetic response for {name}")
@@ -0,0 +1,178 @@
+"""
+Benchmarks of the get_details hot path, run by ``bench.py``.
+
+Each case sets up its data and returns an operation taking the iteration
+number. The operation is timed on its own, its SQL statements are counted
+and its peak memory is traced in a separate pass, all inside a
+transaction that is rolled back afterwards. Django must be set up with a
+test database before running them.
+"""
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from benchmarks.fixtures import place_response, respond
+from places.models import Place
+from places.replay import ReplayClient, install
+from places.wrappers import CacheableWrapper
+
+CASES = {}
+
+# Latency of the fake client for cold calls, in seconds.
+COLD_LATENCY = 0.005
+COLD_JITTER = 0.002
+
+
+def case(name: str, iterations: int = 200):
+    def register(setup):
+        CASES[name] = (setup, iterations)
+        return setup
+
+    return register
+
+
+def details_for(place_id: str) -> dict:
+    return {
+        lang: place_response(place_id, lang)["result"]
+        for lang in settings.MODELTRANSLATION_LANGUAGES
+    }
+
+
+@case("get_details.known")
+def known_address(count: int) -> Callable:
+    addresses = [f"known {n}" for n in range(50)]
+    with install(ReplayClient(fallback=respond)):
+        for address in addresses:
+            Place.objects.get_details(address)
+
+    return lambda n: Place.objects.get_details(addresses[n % len(addresses)])
+
+
+@case("get_details.warm_cache")
+def warm_cache(count: int) -> Callable:
+    client = ReplayClient(fallback=respond)
+    wrapper = CacheableWrapper(client)
+    for n in range(count):
+        place_id = wrapper.find_place(
+            input=f"warm {n}", input_type="textquery"
+        )["candidates"][0]["place_id"]
+        wrapper.call_many("place", Place.objects.get_details_calls(place_id))
+    context = install(client)
+    context.__enter__()
+
+    def get_details(n):
+        Place.objects.get_details(f"warm {n}")
+
+    get_details.cleanup = lambda: context.__exit__(None, None, None)
+    return get_details
+
+
+@case("get_details.cold", iterations=30)
+def cold(count: int) -> Callable:
+    client = ReplayClient(
+        fallback=respond, latency=COLD_LATENCY, jitter=COLD_JITTER, seed=0
+    )
+    context = install(client)
+    context.__enter__()
+
+    def get_details(n):
+        Place.objects.get_details(f"cold {n}")
+
+    get_details.cleanup = lambda: context.__exit__(None, None, None)
+    return get_details
+
+
+@case("extract_components", iterations=1000)
+def extract_components(count: int) -> Callable:
+    samples = [details_for(f"extract {n}") for n in range(50)]
+    return lambda n: Place.objects.parse_defaults(samples[n % len(samples)])
+
+
+@case("wrapper.key_and_codec", iterations=1000)
+def key_and_codec(count: int) -> Callable:
+    wrapper = CacheableWrapper(ReplayClient())
+    response = place_response("codec", "en")
+    fields = Place.objects.get_details_fields()
+
+    def op(n):
+        wrapper.make_key(
+            "place", (f"codec {n}",), {"language": "en", "fields": fields}
+        )
+        wrapper.serializer.loads(wrapper.serializer.dumps(response))
+
+    return op
+
+
+@case("create_place")
+def create_place(count: int) -> Callable:
+    samples = [details_for(f"create {n}") for n in range(count)]
+    return lambda n: Place.objects.create_from_details(
+        f"create {n}", samples[n]
+    )
+
+
+def percentile(timings: list, fraction: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(setup: Callable, iterations: int, warmup: int = 5) -> dict:
+    alloc_runs = min(20, iterations)
+    total = warmup + iterations + alloc_runs
+    op = setup(total)
+    try:
+        for n in range(warmup):
+            op(n)
+
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for n in range(warmup, warmup + iterations):
+                started = time.perf_counter()
+                op(n)
+                timings.append(time.perf_counter() - started)
+
+        peaks = []
+        tracemalloc.start()
+        try:
+            for n in range(warmup + iterations, total):
+                if hasattr(tracemalloc, "reset_peak"):
+                    tracemalloc.reset_peak()
+                else:  # Python 3.8
+                    tracemalloc.stop()
+                    tracemalloc.start()
+                current, _ = tracemalloc.get_traced_memory()
+                op(n)
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            tracemalloc.stop()
+    finally:
+        getattr(op, "cleanup", lambda: None)()
+
+    return {
+        "iterations": iterations,
+        "p50_us": round(percentile(timings, 0.5) * 1e6, 1),
+        "p90_us": round(percentile(timings, 0.9) * 1e6, 1),
+        "p99_us": round(percentile(timings, 0.99) * 1e6, 1),
+        "mean_us": round(statistics.mean(timings) * 1e6, 1),
+        "queries": round(len(queries) / iterations, 2),
+        "peak_kib": round(statistics.median(peaks) / 1024, 1),
+    }
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+def run(names=None) -> Dict[str, dict]:
+    results = {}
+    for name, (setup, iterations) in CASES.items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        caches["locmem"].clear()
+        with transaction.atomic():
+            results[name] = measure(setup, iterations)
+            transaction.set_rollback(True)
+    return results
@@ -6,13 +6,16 @@ from django.conf import settings
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "places"))
 
 
-def boot_django():
-    settings.configure(
+def boot_django(**overrides):
+    options = dict(
         BASE_DIR=BASE_DIR,
         CACHES={
             "default": {
                 "BACKEND": "django.core.cache.backends.dummy.DummyCache",
-            }
+            },
+            "locmem": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
         },
         DEBUG=True,
         DATABASES={
@@ -23,11 +26,34 @@ def boot_django():
         },
         INSTALLED_APPS=(
             "modeltranslation",
+            "django.contrib.admin",
             "django.contrib.auth",
             "django.contrib.contenttypes",
+            "django.contrib.messages",
+            "django.contrib.sessions",
             "places",
             "django_countries",
         ),
+        MIDDLEWARE=(
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+            "django.contrib.messages.middleware.MessageMiddleware",
+        ),
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "APP_DIRS": True,
+                "OPTIONS": {
+                    "context_processors": [
+                        "django.template.context_processors.request",
+                        "django.contrib.auth.context_processors.auth",
+                        "django.contrib.messages.context_processors.messages",
+                    ],
+                },
+            }
+        ],
+        ROOT_URLCONF="places.tests.urls",
+        SECRET_KEY="django-google-places",
         GOOGLE_PLACES_API_KEY="AIzaDummyKey",
         CACHING_TIME=60 * 60 * 24,
         GOOGLE_PLACES_WRAPPER_CACHE_NAME="default",
@@ -36,5 +62,7 @@ def boot_django():
         USE_TZ=True,
         USE_I18N=True,
     )
+    options.update(overrides)
+    settings.configure(**options)
 
     django.setup()
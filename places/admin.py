@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import (
+    AddressQuery,
     AdministrativeAreaLevel1,
     AdministrativeAreaLevel2,
     AdministrativeAreaLevel3,
@@ -32,6 +33,7 @@ models_list = (
     Neighborhood,
     Route,
     Place,
+    AddressQuery,
 )
 
 for model in models_list:
@@ -1,6 +1,22 @@
 from django.conf import settings
+from django.utils.module_loading import import_string
 from googlemaps import Client
 
-from places.wrappers import CacheableWrapper
+from places.wrappers import AsyncCacheableWrapper, CacheableWrapper
 
-cacheable_gmaps = CacheableWrapper(Client(key=settings.GOOGLE_PLACES_API_KEY))
+
+def make_client():
+    """
+    Build the Google Maps client, or the one returned by the factory named
+    by GOOGLE_PLACES_CLIENT.
+    """
+    factory = getattr(settings, "GOOGLE_PLACES_CLIENT", None)
+    if factory is not None:
+        return import_string(factory)()
+    return Client(key=settings.GOOGLE_PLACES_API_KEY)
+
+
+gmaps = make_client()
+
+cacheable_gmaps = CacheableWrapper(gmaps)
+async_cacheable_gmaps = AsyncCacheableWrapper(gmaps)
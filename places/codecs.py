@@ -0,0 +1,144 @@
+"""
+Serializers for the values CacheableWrapper keeps in the cache.
+
+Every value starts with a header byte recording the codec and the
+compression it was written with, so entries written with different
+settings can coexist in one cache. Values without a header are plain
+pickles written before the header was introduced.
+"""
+import json
+import lzma
+import pickle
+import zlib
+from typing import Tuple
+
+PICKLE_PROTO = 0x80
+
+
+class PickleCodec:
+    id = 0x01
+
+    @staticmethod
+    def dumps(value) -> bytes:
+        return pickle.dumps(value)
+
+    @staticmethod
+    def loads(data: bytes):
+        return pickle.loads(data)
+
+
+class JSONCodec:
+    """
+    Compact JSON, for JSON responses only: tuples come back as lists.
+    """
+
+    id = 0x02
+
+    @staticmethod
+    def dumps(value) -> bytes:
+        return json.dumps(
+            value, separators=(",", ":"), ensure_ascii=False
+        ).encode()
+
+    @staticmethod
+    def loads(data: bytes):
+        return json.loads(data)
+
+
+class ZlibCompressor:
+    id = 0x10
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LZMACompressor:
+    id = 0x20
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return lzma.compress(data, preset=self.level)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return lzma.decompress(data)
+
+
+CODECS = {"pickle": PickleCodec, "json": JSONCodec}
+COMPRESSORS = {"zlib": ZlibCompressor, "lzma": LZMACompressor}
+
+
+class Serializer:
+    """
+    Encode values with ``codec`` and compress the ones that are at least
+    ``min_size`` bytes long with ``compression``.
+
+    Values the codec cannot encode, like errors kept by negative caching
+    under the JSON codec, are pickled instead.
+    """
+
+    def __init__(
+        self,
+        codec: str = "pickle",
+        compression: str = None,
+        min_size: int = 1024,
+        level: int = 6,
+    ):
+        self.codec = CODECS[codec]
+        self.compressor = None
+        if compression is not None:
+            self.compressor = COMPRESSORS[compression](level)
+        self.min_size = min_size
+        self._codecs = {codec.id: codec for codec in CODECS.values()}
+        self._compressors = {
+            compressor.id: compressor for compressor in COMPRESSORS.values()
+        }
+
+    def dumps(self, value) -> bytes:
+        return self.encode(value)[0]
+
+    def loads(self, data: bytes):
+        return self.decode(data)[0]
+
+    def encode(self, value) -> Tuple[bytes, int]:
+        """
+        Return the encoded value and the size of its payload before
+        compression.
+        """
+        codec = self.codec
+        try:
+            data = codec.dumps(value)
+        except (TypeError, ValueError):
+            codec = PickleCodec
+            data = codec.dumps(value)
+
+        header = codec.id
+        size = len(data)
+        if self.compressor is not None and size >= self.min_size:
+            data = self.compressor.compress(data)
+            header |= self.compressor.id
+        return bytes((header,)) + data, size
+
+    def decode(self, data: bytes) -> Tuple[object, int]:
+        """
+        Return the decoded value and the size of its payload before
+        compression.
+        """
+        header = data[0]
+        if header == PICKLE_PROTO:
+            return pickle.loads(data), len(data)
+
+        data = data[1:]
+        compression = header & 0xF0
+        if compression:
+            data = self._compressors[compression].decompress(data)
+        return self._codecs[header & 0x0F].loads(data), len(data)
@@ -0,0 +1,190 @@
+"""
+Natural keys of address component rows and an in-process cache of them,
+so components that were seen before resolve to their row without a query.
+"""
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Type
+
+from django.conf import settings
+from django.db import models, transaction
+
+from places.lru import MISSING, LRUCache
+
+
+def get_name_fields() -> List[str]:
+    return [
+        f"{name}_{lang}"
+        for lang in settings.MODELTRANSLATION_LANGUAGES
+        for name in ("long_name", "short_name")
+    ]
+
+
+def make_name_hash(names: dict) -> str:
+    """
+    Natural key of an address component: a hash of its translated long
+    and short names, the missing ones counting as empty.
+    """
+    values = ((names.get(field) or "").strip() for field in get_name_fields())
+    return hashlib.sha256("\x1f".join(values).encode()).hexdigest()
+
+
+class ComponentCache:
+    """
+    LRU cache mapping an address component model and the hash of its
+    translated long and short names to the primary key of the row.
+
+    It holds up to ``GOOGLE_PLACES_COMPONENT_CACHE_SIZE`` entries, 0 (the
+    default) disables it. Rows changed with ``QuerySet.update`` or deleted
+    in bulk without signals are not noticed, call ``clear`` after those.
+    """
+
+    def __init__(self):
+        self._lru = None
+        self._lock = threading.Lock()
+
+    @property
+    def lru(self) -> LRUCache or None:
+        size = getattr(settings, "GOOGLE_PLACES_COMPONENT_CACHE_SIZE", 0)
+        if not size:
+            return None
+        with self._lock:
+            if self._lru is None or self._lru.max_entries != size:
+                self._lru = LRUCache(size)
+            return self._lru
+
+    @staticmethod
+    def make_key(model: Type[models.Model], names: dict) -> tuple:
+        return model._meta.label, make_name_hash(names)
+
+    def get_or_create(
+        self, model: Type[models.Model], names: dict
+    ) -> models.Model:
+        key = self.make_key(model, names)
+        lru = self.lru
+        if lru is not None:
+            pk = lru.get(key)
+            if pk is not MISSING:
+                return self._instance(model, pk, key[1], names)
+
+        instance, created = model.objects.get_or_create(
+            name_hash=key[1], defaults=names
+        )
+        self._remember(key, instance.pk, created)
+        return instance
+
+    def get_or_create_many(
+        self,
+        model: Type[models.Model],
+        names_list: Iterable[dict],
+        batch_size: int = 100,
+    ) -> Dict[tuple, models.Model]:
+        """
+        Rows for every dict of names, mapped by ``make_key``.
+
+        Rows missing from the cache are looked up by their natural key with
+        one ``IN`` query per ``batch_size`` names and the ones that do not
+        exist are inserted with a single ``bulk_create``, which skips rows
+        inserted concurrently. Call it inside a transaction.
+        """
+        lru = self.lru
+        rows = {}
+        pending = {}
+        for names in names_list:
+            key = self.make_key(model, names)
+            if key in rows or key in pending:
+                continue
+            pk = MISSING if lru is None else lru.get(key)
+            if pk is MISSING:
+                pending[key] = names
+            else:
+                rows[key] = self._instance(model, pk, key[1], names)
+        if not pending:
+            return rows
+
+        found = self._find(model, pending, batch_size)
+        for key, instance in found.items():
+            self._remember(key, instance.pk, created=False)
+        rows.update(found)
+
+        missing = {k: v for k, v in pending.items() if k not in found}
+        if missing:
+            model.objects.bulk_create(
+                [
+                    model(name_hash=key[1], **names)
+                    for key, names in missing.items()
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            created = self._find(model, missing, batch_size)
+            for key, instance in created.items():
+                self._remember(key, instance.pk, created=True)
+            rows.update(created)
+        return rows
+
+    def _find(
+        self, model: Type[models.Model], pending: dict, batch_size: int
+    ) -> Dict[tuple, models.Model]:
+        label = model._meta.label
+        hashes = [name_hash for _, name_hash in pending]
+        found = {}
+        for start in range(0, len(hashes), batch_size):
+            batch = hashes[start : start + batch_size]
+            for row in model.objects.filter(name_hash__in=batch):
+                found[label, row.name_hash] = row
+        return found
+
+    @staticmethod
+    def _instance(
+        model: Type[models.Model], pk, name_hash: str, names: dict
+    ) -> models.Model:
+        instance = model(pk=pk, name_hash=name_hash, **names)
+        instance._state.adding = False
+        return instance
+
+    def _remember(self, key: tuple, pk, created: bool):
+        lru = self.lru
+        if lru is None:
+            return
+        if created:
+            # A row created in a transaction that is rolled back must not
+            # be remembered.
+            transaction.on_commit(lambda: lru.set(key, pk))
+        else:
+            lru.set(key, pk)
+
+    def warm(
+        self, component_models: Iterable[Type[models.Model]], limit=None
+    ) -> int:
+        """
+        Load up to ``limit`` rows of every model into the cache and
+        return the number of rows loaded.
+        """
+        lru = self.lru
+        if lru is None:
+            return 0
+
+        count = 0
+        for model in component_models:
+            label = model._meta.label
+            rows = model.objects.order_by("pk").values_list("pk", "name_hash")
+            for pk, name_hash in rows[:limit].iterator():
+                lru.set((label, name_hash), pk)
+                count += 1
+        return count
+
+    def invalidate(self, model: Type[models.Model], pk):
+        lru = self.lru
+        if lru is None:
+            return
+        label = model._meta.label
+        lru.delete_matching(lambda key, value: key[0] == label and value == pk)
+
+    def clear(self):
+        with self._lock:
+            if self._lru is not None:
+                self._lru.clear()
+
+
+component_cache = ComponentCache()
@@ -0,0 +1,79 @@
+"""
+Parsed form of Place Details responses.
+"""
+from typing import Dict
+
+from django.conf import settings
+
+
+class Component:
+    __slots__ = ("long_name", "short_name")
+
+    def __init__(self, long_name: str, short_name: str):
+        self.long_name = long_name
+        self.short_name = short_name
+
+
+class ComponentIndex:
+    """
+    Address components of Place Details responses mapped by language,
+    indexed by type with one pass over each language's components.
+
+    A language is indexed the first time it is read. When several
+    components share a type, the first one wins.
+    """
+
+    __slots__ = ("details", "_languages")
+
+    def __init__(self, details: dict):
+        self.details = details
+        self._languages = {}
+
+    @classmethod
+    def of(cls, details) -> "ComponentIndex":
+        if isinstance(details, cls):
+            return details
+        return cls(details)
+
+    def __getitem__(self, lang: str) -> Dict[str, Component]:
+        try:
+            return self._languages[lang]
+        except KeyError:
+            pass
+
+        components = {}
+        for item in self.details[lang]["address_components"]:
+            component = Component(
+                item.get("long_name"), item.get("short_name")
+            )
+            for type_ in item["types"]:
+                components.setdefault(type_, component)
+        self._languages[lang] = components
+        return components
+
+    def get(self, lang: str, type_: str) -> Component or None:
+        return self[lang].get(type_)
+
+    def get_names(self, type_: str) -> dict:
+        """
+        Translated long and short names of the component of ``type_``, in
+        the form of the translation fields of an ``AddressComponent``.
+        """
+        names = {}
+        for lang in settings.MODELTRANSLATION_LANGUAGES:
+            component = self[lang].get(type_)
+            if component is not None:
+                names[f"long_name_{lang}"] = component.long_name
+                names[f"short_name_{lang}"] = component.short_name
+        return names
+
+    def get_long_names(self, type_: str, field: str) -> dict:
+        """
+        Long names of the component of ``type_`` as ``{field}_{lang}``.
+        """
+        names = {}
+        for lang in settings.MODELTRANSLATION_LANGUAGES:
+            component = self[lang].get(type_)
+            if component is not None:
+                names[f"{field}_{lang}"] = component.long_name
+        return names
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache bounded by entry count and total size,
+    evicting the least recently used entries first.
+
+    Sizes are supplied by the caller, since only it knows how to measure
+    the values it stores. Entries expire after ``timeout`` seconds unless
+    it is None.
+    """
+
+    def __init__(
+        self, max_entries: int, max_bytes: int = None, timeout: float = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key) is not MISSING
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            try:
+                value, size, expires_at = self._data[key]
+            except KeyError:
+                return default
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._pop(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, size: int = 0, timeout: float = MISSING):
+        if timeout is MISSING:
+            timeout = self.timeout
+        expires_at = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, size, expires_at)
+            self.size += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self.size > self.max_bytes
+            ):
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def delete_matching(self, predicate):
+        """
+        Delete the entries for which ``predicate(key, value)`` is true.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key, (value, _, _) in self._data.items()
+                if predicate(key, value)
+            ]
+            for key in keys:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        _, size, _ = self._data.pop(key)
+        self.size -= size
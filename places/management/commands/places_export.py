@@ -0,0 +1,95 @@
+import csv
+import json
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from places.models import Place
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every place with the names of its address components as "
+        "JSONL or CSV, one file per language."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=("jsonl", "csv"), default="jsonl"
+        )
+        parser.add_argument(
+            "--language",
+            action="append",
+            dest="languages",
+            help="Language to export, repeat for several. All of "
+            "MODELTRANSLATION_LANGUAGES by default, the first one when "
+            "writing to stdout.",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            default="-",
+            help='Output file, "-" for stdout. Must contain "{language}" '
+            "when several languages are exported.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Places read per query.",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        languages = options["languages"]
+        if not languages:
+            languages = settings.MODELTRANSLATION_LANGUAGES
+            if output == "-":
+                languages = languages[:1]
+        if len(languages) > 1 and "{language}" not in output:
+            raise CommandError(
+                'Use an --output containing "{language}" to export several '
+                "languages."
+            )
+
+        for language in languages:
+            path = output.format(language=language)
+            with self.open_output(path) as stream:
+                rows = Place.objects.export(
+                    language, chunk_size=options["chunk_size"]
+                )
+                write = getattr(self, f"write_{options['format']}")
+                count = write(stream, rows, language)
+            self.stderr.write(f"Exported {count} places to {path}")
+
+    @staticmethod
+    def write_jsonl(stream, rows, language: str) -> int:
+        count = 0
+        for row in rows:
+            stream.write(
+                json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+                + "\n"
+            )
+            count += 1
+        return count
+
+    @staticmethod
+    def write_csv(stream, rows, language: str) -> int:
+        columns = Place.objects.get_export_columns(language)
+        writer = csv.DictWriter(stream, fieldnames=list(columns))
+        writer.writeheader()
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+
+    @contextmanager
+    def open_output(self, path: str):
+        if path == "-":
+            yield self.stdout
+            return
+        with open(path, "w", encoding="utf-8", newline="") as stream:
+            yield stream
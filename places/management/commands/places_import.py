@@ -0,0 +1,228 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+from places.models import Place
+
+
+def read_addresses(
+    lines: Iterable[str], fmt: str, field: str
+) -> Iterator[str]:
+    """
+    Yield the address of every record of a CSV or JSONL stream, an empty
+    string for records without one and for malformed JSON lines.
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(lines):
+            yield (row.get(field) or "").strip()
+        return
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield ""
+            continue
+        if isinstance(record, dict):
+            record = record.get(field)
+        yield (record or "").strip() if isinstance(record, str) else ""
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Checkpoint:
+    """
+    Number of input records done and the size of the output holding
+    their results, saved atomically after every batch.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self.offset = 0
+
+    def load(self, source: str):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        if state["input"] != source:
+            raise CommandError(
+                f"{self.path} is the checkpoint of {state['input']}, "
+                "remove it to start over."
+            )
+        self.records = state["records"]
+        self.offset = state["offset"]
+
+    def save(self, source: str):
+        state = {
+            "input": source,
+            "records": self.records,
+            "offset": self.offset,
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Resolve the addresses of a CSV or JSONL file into places, writing "
+        "one JSON line per address. Progress is checkpointed after every "
+        "batch, so rerunning an interrupted import resumes it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help='CSV or JSONL file, "-" for stdin.')
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--field",
+            default="address",
+            help="CSV column or JSON key holding the address.",
+        )
+        parser.add_argument(
+            "--output", "-o", required=True, help="JSONL results file."
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file, <output>.checkpoint by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Addresses resolved at once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Concurrent Google requests, GOOGLE_PLACES_MAX_WORKERS by "
+            "default.",
+        )
+
+    def handle(self, *args, **options):
+        source = options["input"]
+        fmt = options["format"]
+        if fmt is None:
+            fmt = "csv" if source.lower().endswith(".csv") else "jsonl"
+        if source != "-":
+            source = os.path.abspath(source)
+        checkpoint = Checkpoint(
+            options["checkpoint"] or f"{options['output']}.checkpoint"
+        )
+        checkpoint.load(source)
+        if checkpoint.records:
+            self.stderr.write(f"Resuming after {checkpoint.records} records")
+
+        started = time.monotonic()
+        done = 0
+        with self.open_input(source) as lines, self.open_output(
+            options["output"], checkpoint.offset
+        ) as output:
+            addresses = islice(
+                read_addresses(lines, fmt, options["field"]),
+                checkpoint.records,
+                None,
+            )
+            for batch in batched(addresses, options["batch_size"]):
+                for row in self.resolve(batch, options["workers"]):
+                    output.write(
+                        json.dumps(row, ensure_ascii=False).encode() + b"\n"
+                    )
+                output.flush()
+                os.fsync(output.fileno())
+
+                checkpoint.records += len(batch)
+                checkpoint.offset = output.tell()
+                checkpoint.save(source)
+                done += len(batch)
+                elapsed = time.monotonic() - started
+                self.stderr.write(
+                    f"records={checkpoint.records} "
+                    f"rate={done / elapsed:.1f}/s"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {checkpoint.records} records into "
+                f"{options['output']}"
+            )
+        )
+
+    @staticmethod
+    def resolve(batch: List[str], workers: int = None) -> Iterator[dict]:
+        addresses = [address for address in batch if address]
+        results = iter(
+            Place.objects.get_details_many(addresses, max_workers=workers)
+        )
+        for address in batch:
+            if not address:
+                yield {"address": address, "status": "invalid"}
+                continue
+            result = next(results)
+            row = {"address": address}
+            if result.error is not None:
+                row.update(status="error", error=repr(result.error))
+            elif result.place is None:
+                row["status"] = "unresolved"
+            else:
+                row.update(
+                    status="resolved",
+                    place_id=result.place.place_id,
+                    pk=result.place.pk,
+                )
+            yield row
+
+    @staticmethod
+    def open_input(source: str):
+        if source == "-":
+            return io.TextIOWrapper(
+                sys.stdin.buffer, encoding="utf-8", newline=""
+            )
+        return open(source, encoding="utf-8", newline="")
+
+    @staticmethod
+    def open_output(path: str, offset: int):
+        """
+        Open the results file for appending after the last checkpoint,
+        dropping results written after it.
+        """
+        if not offset:
+            return open(path, "wb")
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = None
+        if size is None or size < offset:
+            raise CommandError(
+                f"{path} is missing or shorter than its checkpoint, remove "
+                "the checkpoint to start over."
+            )
+        output = open(path, "ab")
+        output.truncate(offset)
+        return output
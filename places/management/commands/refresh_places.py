@@ -0,0 +1,105 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from places.models import Place
+from places.ratelimit import RateLimiter
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-fetch the details of places fetched more than --max-age days "
+        "ago and save the fields that changed. Refreshed places are not "
+        "stale anymore, so an interrupted run resumes where it stopped; "
+        "--after skips past places that keep failing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            default=getattr(settings, "GOOGLE_PLACES_REFRESH_AGE", 30),
+            help="Refresh places fetched more than this many days ago.",
+        )
+        parser.add_argument(
+            "--qps",
+            type=float,
+            default=getattr(settings, "GOOGLE_PLACES_REFRESH_QPS", 10),
+            help="Google requests per second.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Places fetched concurrently.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Places read and saved at once.",
+        )
+        parser.add_argument(
+            "--after",
+            type=int,
+            default=0,
+            help="Start after the place with this primary key.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Refresh at most this many places.",
+        )
+
+    def handle(self, *args, **options):
+        if options["qps"] <= 0:
+            raise CommandError("--qps must be greater than 0.")
+        cutoff = timezone.now() - timedelta(days=options["max_age"])
+        stale = Place.objects.filter(
+            Q(fetched_at__isnull=True) | Q(fetched_at__lt=cutoff)
+        ).order_by("pk")
+        rate_limiter = RateLimiter(options["qps"], burst=options["workers"])
+        chunk_size = options["chunk_size"]
+        limit = options["limit"]
+        last_pk = options["after"]
+        totals = Counter()
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(options["workers"]) as executor:
+            while limit is None or totals["places"] < limit:
+                if limit is not None:
+                    chunk_size = min(chunk_size, limit - totals["places"])
+                chunk = list(stale.filter(pk__gt=last_pk)[:chunk_size])
+                if not chunk:
+                    break
+
+                totals.update(
+                    Place.objects.refresh_many(chunk, executor, rate_limiter)
+                )
+                totals["places"] += len(chunk)
+                last_pk = chunk[-1].pk
+                self.stdout.write(
+                    f"after={last_pk} {self.format_totals(totals, started)}"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Done: {self.format_totals(totals, started)}")
+        )
+
+    @staticmethod
+    def format_totals(totals: Counter, started: float) -> str:
+        elapsed = time.monotonic() - started
+        rate = totals["places"] / elapsed if elapsed else 0
+        return (
+            f"places={totals['places']} updated={totals['updated']} "
+            f"unchanged={totals['unchanged']} failed={totals['failed']} "
+            f"conflicts={totals['conflicts']} "
+            f"elapsed={elapsed:.1f}s rate={rate:.1f}/s"
+        )
@@ -0,0 +1,145 @@
+"""
+Metrics emitted by CacheableWrapper.
+
+GOOGLE_PLACES_METRICS_BACKEND names a callable returning the backend,
+e.g. "places.metrics.StatsdBackend", and defaults to MetricsBackend,
+which drops everything. The wrapper emits:
+
+- ``cache.<event>`` counters tagged with ``method``, where the events
+  are the keys of ``CacheableWrapper.stats`` (``l1_hits``, ``l2_hits``,
+  ``misses``, ``stale``, ``coalesced``…);
+- ``api.latency`` timings of the client calls in seconds and
+  ``api.errors`` counters of the failed ones, tagged with ``method`` and
+  the error ``status``;
+- ``cache.value_bytes`` histograms of the serialized size of the values
+  written to the cache, tagged with ``method``.
+"""
+import functools
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class MetricsBackend:
+    """
+    Backend interface, dropping every metric.
+    """
+
+    def incr(self, name: str, value: int = 1, tags: dict = None):
+        pass
+
+    def timing(self, name: str, seconds: float, tags: dict = None):
+        pass
+
+    def histogram(self, name: str, value: float, tags: dict = None):
+        pass
+
+
+class StatsdBackend(MetricsBackend):
+    """
+    Send metrics to a statsd client, by default a ``statsd.StatsClient``
+    for GOOGLE_PLACES_STATSD_HOST and GOOGLE_PLACES_STATSD_PORT.
+
+    Tag values are appended to the metric name, so ``cache.l2_hits`` of
+    ``place`` is sent as ``places.cache.l2_hits.place``. Histograms are
+    sent as timers, which statsd aggregates the same way.
+    """
+
+    def __init__(self, client=None, prefix: str = "places"):
+        if client is None:
+            try:
+                from statsd import StatsClient
+            except ImportError:
+                raise ImproperlyConfigured(
+                    "StatsdBackend requires the statsd package."
+                )
+            client = StatsClient(
+                getattr(settings, "GOOGLE_PLACES_STATSD_HOST", "localhost"),
+                getattr(settings, "GOOGLE_PLACES_STATSD_PORT", 8125),
+            )
+        self.client = client
+        self.prefix = prefix
+
+    def make_name(self, name: str, tags: dict = None) -> str:
+        parts = [self.prefix, name]
+        for key in sorted(tags or ()):
+            parts.append(str(tags[key]).replace(".", "_"))
+        return ".".join(part for part in parts if part)
+
+    def incr(self, name: str, value: int = 1, tags: dict = None):
+        self.client.incr(self.make_name(name, tags), value)
+
+    def timing(self, name: str, seconds: float, tags: dict = None):
+        self.client.timing(self.make_name(name, tags), seconds * 1000)
+
+    def histogram(self, name: str, value: float, tags: dict = None):
+        self.client.timing(self.make_name(name, tags), value)
+
+
+class PrometheusBackend(MetricsBackend):
+    """
+    Record metrics with prometheus_client in ``registry``, the default
+    registry if not given, as ``places_<name>_total`` counters and
+    ``places_<name>`` histograms labelled with the tags.
+    """
+
+    BYTE_BUCKETS = tuple(2**n for n in range(6, 21, 2)) + (float("inf"),)
+
+    def __init__(self, registry=None, prefix: str = "places"):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImproperlyConfigured(
+                "PrometheusBackend requires the prometheus_client package."
+            )
+        self.prometheus = prometheus_client
+        self.registry = registry or prometheus_client.REGISTRY
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def get_metric(self, kind: str, name: str, tags: dict, **kwargs):
+        metric_name = f"{self.prefix}_{name.replace('.', '_')}"
+        with self._lock:
+            if metric_name not in self._metrics:
+                self._metrics[metric_name] = getattr(self.prometheus, kind)(
+                    metric_name,
+                    f"django-google-places {name}",
+                    sorted(tags or ()),
+                    registry=self.registry,
+                    **kwargs,
+                )
+            metric = self._metrics[metric_name]
+        return metric.labels(**tags) if tags else metric
+
+    def incr(self, name: str, value: int = 1, tags: dict = None):
+        self.get_metric("Counter", name, tags).inc(value)
+
+    def timing(self, name: str, seconds: float, tags: dict = None):
+        self.get_metric("Histogram", f"{name}.seconds", tags).observe(seconds)
+
+    def histogram(self, name: str, value: float, tags: dict = None):
+        self.get_metric(
+            "Histogram", name, tags, buckets=self.BYTE_BUCKETS
+        ).observe(value)
+
+
+@functools.lru_cache()
+def load_backend(path: str) -> MetricsBackend:
+    return import_string(path)()
+
+
+def get_metrics_backend() -> MetricsBackend:
+    """
+    Return the backend named by GOOGLE_PLACES_METRICS_BACKEND, built once
+    per process.
+    """
+    return load_backend(
+        getattr(
+            settings,
+            "GOOGLE_PLACES_METRICS_BACKEND",
+            "places.metrics.MetricsBackend",
+        )
+    )
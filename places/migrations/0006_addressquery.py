@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("places", "0005_auto_20190917_0828"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AddressQuery",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "query_hash",
+                    models.CharField(max_length=64, unique=True),
+                ),
+                ("query", models.TextField()),
+                ("hits", models.PositiveIntegerField(default=0)),
+                (
+                    "last_seen",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "place",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="queries",
+                        to="places.Place",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "address query",
+                "verbose_name_plural": "address queries",
+            },
+        ),
+    ]
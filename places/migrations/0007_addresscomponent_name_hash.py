@@ -0,0 +1,97 @@
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+# Address component models and the Place fields pointing at them.
+COMPONENT_FIELDS = (
+    ("AdministrativeAreaLevel1", "administrative_area_level_1"),
+    ("AdministrativeAreaLevel2", "administrative_area_level_2"),
+    ("AdministrativeAreaLevel3", "administrative_area_level_3"),
+    ("AdministrativeAreaLevel4", "administrative_area_level_4"),
+    ("AdministrativeAreaLevel5", "administrative_area_level_5"),
+    ("Locality", "locality"),
+    ("SubLocalityLevel1", "sublocality_level_1"),
+    ("SubLocalityLevel2", "sublocality_level_2"),
+    ("SubLocalityLevel3", "sublocality_level_3"),
+    ("SubLocalityLevel4", "sublocality_level_4"),
+    ("SubLocalityLevel5", "sublocality_level_5"),
+    ("Neighborhood", "neighborhood"),
+    ("Route", "route"),
+)
+
+
+# Frozen copies of places.components.get_name_fields and make_name_hash as
+# of this migration, so later changes to them do not change its behavior.
+def get_name_fields():
+    return [
+        f"{name}_{lang}"
+        for lang in settings.MODELTRANSLATION_LANGUAGES
+        for name in ("long_name", "short_name")
+    ]
+
+
+def make_name_hash(names, fields):
+    values = ((names.get(field) or "").strip() for field in fields)
+    return hashlib.sha256("\x1f".join(values).encode()).hexdigest()
+
+
+def fill_name_hashes(model, batch_size=2000):
+    fields = get_name_fields()
+    batch = []
+    for row in model.objects.order_by("pk").iterator(chunk_size=batch_size):
+        row.name_hash = make_name_hash(
+            {field: getattr(row, field, None) for field in fields}, fields
+        )
+        batch.append(row)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, ["name_hash"])
+            batch = []
+    model.objects.bulk_update(batch, ["name_hash"])
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Keep the oldest of the rows sharing a name hash and point the Places
+    using the others at it.
+    """
+    Place = apps.get_model("places", "Place")
+    for model_name, field in COMPONENT_FIELDS:
+        model = apps.get_model("places", model_name)
+        fill_name_hashes(model)
+
+        duplicates = (
+            model.objects.values("name_hash")
+            .annotate(rows=Count("pk"), keep=Min("pk"))
+            .filter(rows__gt=1)
+        )
+        for duplicate in duplicates.iterator():
+            others = model.objects.filter(
+                name_hash=duplicate["name_hash"]
+            ).exclude(pk=duplicate["keep"])
+            Place.objects.filter(**{f"{field}__in": others}).update(
+                **{field: duplicate["keep"]}
+            )
+            others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("places", "0006_addressquery"),
+    ]
+
+    operations = [
+        *(
+            migrations.AddField(
+                model_name=model_name.lower(),
+                name="name_hash",
+                field=models.CharField(
+                    editable=False, max_length=64, null=True
+                ),
+            )
+            for model_name, _ in COMPONENT_FIELDS
+        ),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+COMPONENT_MODELS = (
+    "administrativearealevel1",
+    "administrativearealevel2",
+    "administrativearealevel3",
+    "administrativearealevel4",
+    "administrativearealevel5",
+    "locality",
+    "sublocalitylevel1",
+    "sublocalitylevel2",
+    "sublocalitylevel3",
+    "sublocalitylevel4",
+    "sublocalitylevel5",
+    "neighborhood",
+    "route",
+)
+
+
+class Migration(migrations.Migration):
+    """
+    Kept apart from 0007 so the data it changes is committed before the
+    tables are altered.
+    """
+
+    dependencies = [
+        ("places", "0007_addresscomponent_name_hash"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name=model_name,
+            name="name_hash",
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        )
+        for model_name in COMPONENT_MODELS
+    ]
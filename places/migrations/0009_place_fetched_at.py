@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("places", "0008_alter_addresscomponent_name_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="place",
+            name="fetched_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
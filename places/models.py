@@ -2,12 +2,38 @@
 Google places Address Types and Address Component Types
 https://developers.google.com/maps/documentation/geocoding/intro#Types
 """
-from typing import Type, TypeVar
+import asyncio
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db import models
+from django.core.cache import caches
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
 
-from places.clients import cacheable_gmaps
+from places.clients import async_cacheable_gmaps, cacheable_gmaps, gmaps
+from places.components import component_cache, get_name_fields, make_name_hash
+from places.details import ComponentIndex
+from places.profiling import profiled, stage
 
 try:
     from django_countries.fields import CountryField
@@ -16,14 +42,33 @@ except ModuleNotFoundError:
 
 DjModel = TypeVar("DjModel", bound=models.Model)
 
+logger = logging.getLogger(__name__)
+
+# The Place Details fields parse_defaults reads.
+DETAILS_FIELDS = (
+    "address_component",
+    "formatted_address",
+    "geometry/location",
+)
+
 
 class AddressComponent(models.Model):
     long_name = models.CharField(max_length=50)
     short_name = models.CharField(max_length=50)
+    name_hash = models.CharField(max_length=64, unique=True, editable=False)
 
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        self.name_hash = make_name_hash(
+            {field: getattr(self, field) for field in get_name_fields()}
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "name_hash"}
+        super().save(*args, **kwargs)
+
 
 class AdministrativeAreaLevel1(AddressComponent):
     pass
@@ -79,110 +124,672 @@ class Route(AddressComponent):
     pass
 
 
+# Place fields holding address components, named after the component type.
+COMPONENT_MODELS = {
+    "administrative_area_level_1": AdministrativeAreaLevel1,
+    "administrative_area_level_2": AdministrativeAreaLevel2,
+    "administrative_area_level_3": AdministrativeAreaLevel3,
+    "administrative_area_level_4": AdministrativeAreaLevel4,
+    "administrative_area_level_5": AdministrativeAreaLevel5,
+    "locality": Locality,
+    "sublocality_level_1": SubLocalityLevel1,
+    "sublocality_level_2": SubLocalityLevel2,
+    "sublocality_level_3": SubLocalityLevel3,
+    "sublocality_level_4": SubLocalityLevel4,
+    "sublocality_level_5": SubLocalityLevel5,
+    "neighborhood": Neighborhood,
+    "route": Route,
+}
+
+
+class Resolution(NamedTuple):
+    address: str
+    place: Optional["Place"]
+    error: Optional[Exception] = None
+
+
+_language_executors = {}
+_language_executors_lock = threading.Lock()
+
+
+def get_language_executor() -> ThreadPoolExecutor or None:
+    """
+    Return the shared pool for per-language place() calls, or None when
+    GOOGLE_PLACES_LANGUAGE_WORKERS is not set and languages are fetched
+    one after another.
+    """
+    workers = getattr(settings, "GOOGLE_PLACES_LANGUAGE_WORKERS", 0)
+    if not workers:
+        return None
+
+    with _language_executors_lock:
+        if workers not in _language_executors:
+            _language_executors[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="places-language"
+            )
+        return _language_executors[workers]
+
+
+def _capture(func, *args):
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, e
+
+
 class PlaceManager(models.Manager):
+    @profiled("get_details")
     def get_details(self, address: str):
+        with stage("lookup"):
+            place = AddressQuery.objects.lookup(address)
+            if place is not None:
+                return place
+
+            if AddressQuery.objects.is_unresolved(address):
+                return None
+
+        with stage("find_place"):
+            place_id = self.find_place_id(address)
+        if place_id is None:
+            with stage("remember"):
+                AddressQuery.objects.remember_unresolved(address)
+            return None
+
+        try:
+            with stage("get_place"):
+                place = self.model.objects.get(place_id=place_id)
+        except self.model.DoesNotExist:
+            place = self.create_from_place_id(place_id)
+
+        with stage("remember"):
+            if place is None:
+                AddressQuery.objects.remember_unresolved(address)
+            else:
+                AddressQuery.objects.remember(address, place)
+        return place
+
+    async def aget_details(self, address: str):
+        """
+        Asyncio flavour of get_details.
+        """
+        place = await AddressQuery.objects.alookup(address)
+        if place is not None:
+            return place
+
+        if await AddressQuery.objects.ais_unresolved(address):
+            return None
+
+        place_id = await self.afind_place_id(address)
+        if place_id is None:
+            await AddressQuery.objects.aremember_unresolved(address)
+            return None
+
+        try:
+            place = await self.model.objects.aget(place_id=place_id)
+        except self.model.DoesNotExist:
+            place = await self.acreate_from_place_id(place_id)
+
+        if place is None:
+            await AddressQuery.objects.aremember_unresolved(address)
+        else:
+            await AddressQuery.objects.aremember(address, place)
+        return place
+
+    def get_details_many(
+        self,
+        addresses: Iterable[str],
+        max_workers: int = None,
+        batch_size: int = 500,
+    ) -> List[Resolution]:
+        """
+        Resolve a batch of addresses at once.
+
+        Duplicates are resolved once, known place_ids are loaded with a
+        single query and the missing details are fetched concurrently.
+        Results are returned in input order, failures are reported per
+        address instead of being raised.
+        """
+        addresses = list(addresses)
+        normalize = AddressQuery.objects.normalize
+        queries = {}
+        for address in addresses:
+            queries.setdefault(normalize(address), address)
+
+        places = AddressQuery.objects.lookup_many(queries.values())
+        known_bad = AddressQuery.objects.unresolved_many(
+            q for q in queries.values() if normalize(q) not in places
+        )
+        errors = {}
+        resolved = {}
+
+        if max_workers is None:
+            max_workers = getattr(settings, "GOOGLE_PLACES_MAX_WORKERS", 8)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = [
+                q for q in queries if q not in places and q not in known_bad
+            ]
+            responses = cacheable_gmaps.call_many(
+                "find_place",
+                [
+                    ((), {"input": queries[q], "input_type": "textquery"})
+                    for q in pending
+                ],
+                executor=executor,
+                return_exceptions=True,
+            )
+            place_ids = {}
+            for query, response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    errors[query] = response
+                    continue
+                place_id, error = _capture(self.parse_place_id, response)
+                if error is not None:
+                    errors[query] = error
+                elif place_id is not None:
+                    place_ids[query] = place_id
+
+            known = self.in_bulk(
+                set(place_ids.values()), field_name="place_id"
+            )
+            missing = sorted(set(place_ids.values()) - set(known))
+            fetched = {}
+            fetch_errors = {}
+            for start in range(0, len(missing), batch_size):
+                chunk = missing[start : start + batch_size]
+                for place_id, details in self.fetch_details_many(
+                    chunk, executor
+                ).items():
+                    if isinstance(details, Exception):
+                        fetch_errors[place_id] = details
+                    else:
+                        fetched[place_id] = details
+
+        new = {}
+        for place_id, details in fetched.items():
+            defaults, error = _capture(self.parse_defaults, details)
+            if error is not None:
+                fetch_errors[place_id] = error
+            elif defaults is not None:
+                new[place_id] = defaults
+        with transaction.atomic():
+            self.resolve_components(list(new.values()))
+            known.update(self.bulk_create_from_defaults(new, batch_size))
+
+        for query, place_id in place_ids.items():
+            if place_id in known:
+                resolved[query] = known[place_id]
+            elif place_id in fetch_errors:
+                errors[query] = fetch_errors[place_id]
+        AddressQuery.objects.remember_many(
+            (queries[q], p) for q, p in resolved.items()
+        )
+        AddressQuery.objects.remember_unresolved_many(
+            queries[q]
+            for q in pending
+            if q not in resolved and q not in errors
+        )
+        places.update(resolved)
+
+        return [
+            Resolution(
+                address,
+                places.get(normalize(address)),
+                errors.get(normalize(address)),
+            )
+            for address in addresses
+        ]
+
+    def find_place_id(self, address: str) -> str or None:
         candidates = cacheable_gmaps.find_place(
             input=address,
             input_type="textquery",
         )
+        return self.parse_place_id(candidates)
 
+    @staticmethod
+    def parse_place_id(candidates: dict) -> str or None:
         if candidates["status"] != "OK":
             return None
 
-        place_id = candidates["candidates"][0]["place_id"]
+        return candidates["candidates"][0]["place_id"]
 
-        try:
-            return self.model.objects.get(place_id=place_id)
-        except self.model.DoesNotExist:
-            pass
+    @staticmethod
+    def get_details_fields() -> List[str] or None:
+        fields = getattr(
+            settings, "GOOGLE_PLACES_DETAILS_FIELDS", DETAILS_FIELDS
+        )
+        if fields is None:
+            return None
+        # Sorted, so the same mask always maps to the same cache key.
+        return sorted(set(fields))
+
+    @classmethod
+    def get_details_calls(cls, place_id: str) -> List[Tuple[tuple, dict]]:
+        kwargs = {}
+        fields = cls.get_details_fields()
+        if fields is not None:
+            kwargs["fields"] = fields
+        return [
+            ((place_id,), {**kwargs, "language": lang})
+            for lang in settings.MODELTRANSLATION_LANGUAGES
+        ]
+
+    @staticmethod
+    def parse_details(responses: list) -> dict:
+        return {
+            lang: response["result"]
+            for lang, response in zip(
+                settings.MODELTRANSLATION_LANGUAGES, responses
+            )
+        }
+
+    def fetch_details(self, place_id: str) -> dict:
+        responses = cacheable_gmaps.call_many(
+            "place",
+            self.get_details_calls(place_id),
+            executor=get_language_executor(),
+        )
+        return self.parse_details(responses)
+
+    def fetch_details_many(
+        self, place_ids: List[str], executor: Executor = None
+    ) -> dict:
+        """
+        Fetch the details of several places with a single cache read.
+        Return the details, or the error raised fetching them, mapped by
+        place_id.
+        """
+        calls = []
+        for place_id in place_ids:
+            calls.extend(self.get_details_calls(place_id))
+        responses = cacheable_gmaps.call_many(
+            "place", calls, executor=executor, return_exceptions=True
+        )
 
         details = {}
-        for lang in settings.MODELTRANSLATION_LANGUAGES:
-            details[lang] = cacheable_gmaps.place(
-                place_id,
-                language=lang,
-            )["result"]
+        count = len(settings.MODELTRANSLATION_LANGUAGES)
+        for n, place_id in enumerate(place_ids):
+            chunk = responses[n * count : (n + 1) * count]
+            error = next((r for r in chunk if isinstance(r, Exception)), None)
+            if error is None:
+                details[place_id], error = _capture(self.parse_details, chunk)
+            if error is not None:
+                details[place_id] = error
+        return details
+
+    async def afind_place_id(self, address: str) -> str or None:
+        candidates = await async_cacheable_gmaps.find_place(
+            input=address,
+            input_type="textquery",
+        )
+        return self.parse_place_id(candidates)
+
+    async def afetch_details(self, place_id: str) -> dict:
+        responses = await async_cacheable_gmaps.acall_many(
+            "place", self.get_details_calls(place_id)
+        )
+        return self.parse_details(responses)
+
+    @property
+    def claim_cache(self):
+        return caches[settings.GOOGLE_PLACES_WRAPPER_CACHE_NAME]
+
+    @staticmethod
+    def make_claim_key(place_id: str) -> str:
+        prefix = getattr(settings, "GOOGLE_PLACES_CACHE_KEY_PREFIX", "places")
+        digest = hashlib.sha256(place_id.encode()).hexdigest()
+        return f"{prefix}:claim:{digest}"
+
+    @staticmethod
+    def get_claim_timeout() -> int:
+        return getattr(settings, "GOOGLE_PLACES_CLAIM_TIMEOUT", 30)
+
+    def create_from_place_id(self, place_id: str):
+        """
+        Fetch and store a new Place.
+
+        Concurrent calls for the same place_id are coalesced with a cache
+        lock: the caller that claims it fetches the details and the others
+        wait for the stored row instead of fetching them again. The claim
+        is released once the row is committed, or right away on failure.
+        """
+        key = self.make_claim_key(place_id)
+        timeout = self.get_claim_timeout()
+        claimed = not timeout or self.claim_cache.add(key, 1, timeout)
+        if not claimed:
+            with stage("wait_for_claim"):
+                place = self.wait_for_claim(key, place_id, timeout)
+            if place is not None:
+                return place
 
+        if not (claimed and timeout):
+            with stage("fetch_details"):
+                details = self.fetch_details(place_id)
+            return self.create_from_details(place_id, details)
+
+        try:
+            with stage("fetch_details"):
+                details = self.fetch_details(place_id)
+            return self.create_claimed(key, place_id, details)
+        except BaseException:
+            self.claim_cache.delete(key)
+            raise
+
+    def create_claimed(self, key: str, place_id: str, details: dict):
+        """
+        Store a new Place and release the claim on its place_id once the
+        row is committed, so waiters inside ``wait_for_claim`` find it.
+        """
+        place = self.create_from_details(place_id, details)
+        transaction.on_commit(lambda: self.claim_cache.delete(key))
+        return place
+
+    def wait_for_claim(self, key: str, place_id: str, timeout: int):
+        """
+        Wait until the claim on the place_id is released and return the
+        Place it stored, or None when it stored none or never finished.
+        """
+        interval = getattr(settings, "GOOGLE_PLACES_CLAIM_POLL_INTERVAL", 0.1)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            place = self.filter(place_id=place_id).first()
+            if place is not None or self.claim_cache.get(key) is None:
+                return place
+        return None
+
+    async def acreate_from_place_id(self, place_id: str):
+        key = self.make_claim_key(place_id)
+        timeout = self.get_claim_timeout()
+        claimed = not timeout or await self.claim_cache.aadd(key, 1, timeout)
+        if not claimed:
+            place = await self.await_for_claim(key, place_id, timeout)
+            if place is not None:
+                return place
+
+        if not (claimed and timeout):
+            details = await self.afetch_details(place_id)
+            return await sync_to_async(self.create_from_details)(
+                place_id, details
+            )
+
+        try:
+            details = await self.afetch_details(place_id)
+            return await sync_to_async(self.create_claimed)(
+                key, place_id, details
+            )
+        except BaseException:
+            await self.claim_cache.adelete(key)
+            raise
+
+    async def await_for_claim(self, key: str, place_id: str, timeout: int):
+        interval = getattr(settings, "GOOGLE_PLACES_CLAIM_POLL_INTERVAL", 0.1)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            place = await self.filter(place_id=place_id).afirst()
+            if place is not None or await self.claim_cache.aget(key) is None:
+                return place
+        return None
+
+    def create_from_details(self, place_id: str, details: dict):
+        with stage("parse"):
+            defaults = self.parse_defaults(details)
+        if defaults is None:
+            return None
+        try:
+            with transaction.atomic():
+                with stage("components"):
+                    self.resolve_components([defaults])
+                with stage("insert"):
+                    return self.model.objects.create(
+                        place_id=place_id, **defaults
+                    )
+        except IntegrityError:
+            # Another worker stored the place first.
+            place = self.filter(place_id=place_id).first()
+            if place is None:
+                raise
+            return place
+
+    def bulk_create_from_defaults(
+        self, defaults: Dict[str, dict], batch_size: int = 500
+    ) -> Dict[str, "Place"]:
+        """
+        Insert Places from prepared field values mapped by place_id and
+        return the stored Places in the same mapping.
+        """
+        objs = [
+            self.model(place_id=place_id, **values)
+            for place_id, values in defaults.items()
+        ]
+        with transaction.atomic():
+            self.bulk_create(
+                objs, batch_size=batch_size, ignore_conflicts=True
+            )
+        return self.in_bulk(list(defaults), field_name="place_id")
+
+    def parse_defaults(self, details: dict) -> dict or None:
+        """
+        Field values of a Place, holding the translated names of its
+        address components until ``resolve_components`` swaps them for
+        rows.
+        """
         defaults = {}
         # formatted_address
         defaults.update(self.get_formatted_address(details))
+        components = ComponentIndex(details)
         # country
         try:
-            defaults["country"] = self.get_country_code(details)
+            defaults["country"] = self.get_country_code(components)
         except StopIteration:  # For example: Малые Антильские острова
             return None
-        # administrative_area_level
-        defaults["administrative_area_level_1"] = self.get_component_object(
-            AdministrativeAreaLevel1, "administrative_area_level_1", details
-        )
-        defaults["administrative_area_level_2"] = self.get_component_object(
-            AdministrativeAreaLevel2, "administrative_area_level_2", details
-        )
-        defaults["administrative_area_level_3"] = self.get_component_object(
-            AdministrativeAreaLevel3, "administrative_area_level_3", details
-        )
-        defaults["administrative_area_level_4"] = self.get_component_object(
-            AdministrativeAreaLevel4, "administrative_area_level_4", details
-        )
-        defaults["administrative_area_level_5"] = self.get_component_object(
-            AdministrativeAreaLevel1, "administrative_area_level_5", details
-        )
-        # locality
-        defaults["locality"] = self.get_component_object(
-            Locality,
-            "locality",
-            details,
-        )
-        # sublocality_level
-        defaults["sublocality_level_1"] = self.get_component_object(
-            SubLocalityLevel1, "sublocality_level_1", details
-        )
-        defaults["sublocality_level_2"] = self.get_component_object(
-            SubLocalityLevel2, "sublocality_level_2", details
-        )
-        defaults["sublocality_level_3"] = self.get_component_object(
-            SubLocalityLevel3, "sublocality_level_3", details
-        )
-        defaults["sublocality_level_4"] = self.get_component_object(
-            SubLocalityLevel4, "sublocality_level_4", details
-        )
-        defaults["sublocality_level_5"] = self.get_component_object(
-            SubLocalityLevel5, "sublocality_level_5", details
-        )
-        # neighborhood
-        defaults["neighborhood"] = self.get_component_object(
-            Neighborhood, "neighborhood", details
-        )
-        # route
-        defaults["route"] = self.get_component_object(Route, "route", details)
+        # administrative areas, localities, neighborhood and route
+        for field in COMPONENT_MODELS:
+            defaults[field] = components.get_names(field)
         # street_number
-        defaults.update(self.get_street_number(details))
+        defaults.update(self.get_street_number(components))
         # floor
-        defaults.update(self.get_floor(details))
+        defaults.update(self.get_floor(components))
         # room
-        defaults.update(self.get_room(details))
+        defaults.update(self.get_room(components))
         # postal_code
-        defaults["postal_code"] = self.get_postal_code(details)
+        defaults["postal_code"] = self.get_postal_code(components)
         # lat and lng
         defaults.update(self.get_lat_lng(details))
+        defaults["fetched_at"] = timezone.now()
 
-        return self.model.objects.create(place_id=place_id, **defaults)
+        return defaults
 
     @staticmethod
-    def get_component_object(
-        model: Type[DjModel], key: str, data: dict
-    ) -> models.Model or None:
-        kwargs = {}
+    def resolve_components(defaults_list: List[dict]):
+        """
+        Replace the component names in parsed defaults with component
+        rows, looking up and inserting the rows of the whole batch with a
+        few queries per component model.
+        """
+        for field, model in COMPONENT_MODELS.items():
+            rows = component_cache.get_or_create_many(
+                model, (d[field] for d in defaults_list if d[field])
+            )
+            for defaults in defaults_list:
+                names = defaults[field]
+                defaults[field] = (
+                    rows[component_cache.make_key(model, names)]
+                    if names
+                    else None
+                )
 
-        for lang in settings.MODELTRANSLATION_LANGUAGES:
-            for item in data[lang]["address_components"]:
-                if key in item["types"]:
-                    kwargs[f"long_name_{lang}"] = item["long_name"]
-                    kwargs[f"short_name_{lang}"] = item["short_name"]
+    def get_refresh_calls(self, place_id: str) -> List[Tuple[tuple, dict]]:
+        calls = self.get_details_calls(place_id)
+        for _, kwargs in calls:
+            # place_id is free to ask for and tells when it changed.
+            if "fields" in kwargs and "place_id" not in kwargs["fields"]:
+                kwargs["fields"] = sorted([*kwargs["fields"], "place_id"])
+        return calls
+
+    def fetch_fresh_details(self, place_id: str, rate_limiter=None) -> dict:
+        """
+        Fetch the details of a place from Google, bypassing the cache.
+        """
+        responses = []
+        for args, kwargs in self.get_refresh_calls(place_id):
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            responses.append(gmaps.place(*args, **kwargs))
+        return self.parse_details(responses)
+
+    def refresh_many(
+        self,
+        places: List["Place"],
+        executor: Executor = None,
+        rate_limiter=None,
+    ) -> Counter:
+        """
+        Re-fetch the details of places and save the fields that changed.
+
+        Returns the number of ``updated``, ``unchanged`` and ``failed``
+        places. Failed places keep their ``fetched_at``. Places whose new
+        place_id is taken, by an existing row or an earlier place of the
+        chunk, keep their place_id; they are logged and counted as
+        ``conflicts`` too.
+        """
+
+        def fetch(place):
+            return _capture(
+                self.fetch_fresh_details, place.place_id, rate_limiter
+            )
+
+        mapper = map if executor is None else executor.map
+        stats = Counter()
+        parsed = []
+        for place, (details, error) in zip(places, mapper(fetch, places)):
+            if error is None:
+                defaults, error = _capture(self.parse_defaults, details)
+            if error is not None or defaults is None:
+                stats["failed"] += 1
+                continue
+            new_place_id = details["en"].get("place_id", place.place_id)
+            if new_place_id != place.place_id:
+                defaults["place_id"] = new_place_id
+            parsed.append((place, defaults))
+
+        taken = set(
+            self.filter(
+                place_id__in=[
+                    d["place_id"] for _, d in parsed if "place_id" in d
+                ]
+            ).values_list("place_id", flat=True)
+        )
+        groups = {}
+        with transaction.atomic():
+            self.resolve_components([defaults for _, defaults in parsed])
+            for place, defaults in parsed:
+                new_place_id = defaults.get("place_id")
+                if new_place_id in taken:
+                    logger.warning(
+                        "Place %s keeps place_id %r, its new place_id %r "
+                        "is taken.",
+                        place.pk,
+                        place.place_id,
+                        new_place_id,
+                    )
+                    stats["conflicts"] += 1
+                    del defaults["place_id"]
+                elif new_place_id is not None:
+                    taken.add(new_place_id)
+                changed = self.apply_defaults(place, defaults)
+                groups.setdefault(tuple(sorted(changed)), []).append(place)
+                stats[
+                    "updated" if changed != ["fetched_at"] else "unchanged"
+                ] += 1
+            for fields, objs in groups.items():
+                self.bulk_update(objs, fields)
+        return stats
+
+    def apply_defaults(self, place: "Place", defaults: dict) -> List[str]:
+        """
+        Set the field values that differ on the place and return the names
+        of the fields that changed.
+        """
+        changed = []
+        for name, value in defaults.items():
+            field = self.model._meta.get_field(name)
+            if field.many_to_one:
+                value = None if value is None else value.pk
+            else:
+                value = field.to_python(value)
+            if getattr(place, field.attname) != value:
+                setattr(place, field.attname, value)
+                changed.append(name)
+        return changed
+
+    @staticmethod
+    def get_export_columns(language: str = None) -> Dict[str, str]:
+        """
+        Map the keys of exported rows to the lookups reading them.
+        """
+        if language is None:
+            language = settings.MODELTRANSLATION_LANGUAGES[0]
+        columns = {
+            "pk": "pk",
+            "place_id": "place_id",
+            "formatted_address": f"formatted_address_{language}",
+            "country": "country",
+        }
+        for field in COMPONENT_MODELS:
+            columns[field] = f"{field}__long_name_{language}"
+            columns[f"{field}_short_name"] = f"{field}__short_name_{language}"
+        columns.update(
+            street_number=f"street_number_{language}",
+            floor=f"floor_{language}",
+            room=f"room_{language}",
+            postal_code="postal_code",
+            latitude="latitude",
+            longitude="longitude",
+            fetched_at="fetched_at",
+        )
+        return columns
+
+    def export(
+        self,
+        language: str = None,
+        chunk_size: int = 2000,
+        queryset: models.QuerySet = None,
+    ) -> Iterator[dict]:
+        """
+        Yield places as flat dicts in ``language`` with the names of their
+        address components, reading ``chunk_size`` places per query in
+        primary key order so memory use does not grow with the table.
+        """
+        columns = self.get_export_columns(language)
+        if queryset is None:
+            queryset = self.all()
+        rows = queryset.order_by("pk").values(*columns.values())
+        last_pk = None
+        while True:
+            page = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+            chunk = list(page[:chunk_size])
+            for row in chunk:
+                yield {name: row[path] for name, path in columns.items()}
+            if len(chunk) < chunk_size:
+                return
+            last_pk = chunk[-1]["pk"]
 
+    def warm_component_cache(self, limit: int = None) -> int:
+        """
+        Load address component rows into the in-process component cache.
+        """
+        return component_cache.warm(COMPONENT_MODELS.values(), limit)
+
+    @staticmethod
+    def get_component_object(
+        model: Type[DjModel], key: str, data: dict or ComponentIndex
+    ) -> models.Model or None:
+        kwargs = ComponentIndex.of(data).get_names(key)
         if kwargs:
-            p, _ = model.objects.get_or_create(**kwargs)
-            return p
+            return component_cache.get_or_create(model, kwargs)
         return None
 
     @staticmethod
@@ -195,66 +802,31 @@ class PlaceManager(models.Manager):
         return defaults
 
     @staticmethod
-    def get_country_code(details: dict) -> str:
-        return next(
-            filter(
-                lambda x: x if "country" in x["types"] else None,
-                details["en"]["address_components"],
-            )
-        )["short_name"]
+    def get_country_code(details: dict or ComponentIndex) -> str:
+        country = ComponentIndex.of(details).get("en", "country")
+        if country is None:
+            raise StopIteration
+        return country.short_name
 
     @staticmethod
-    def get_street_number(details: dict) -> dict:
-        defaults = {}
-        for lang in settings.MODELTRANSLATION_LANGUAGES:
-            numbers = list(
-                filter(
-                    lambda x: x if "street_number" in x["types"] else None,
-                    details[lang]["address_components"],
-                )
-            )
-            if numbers:
-                defaults[f"street_number_{lang}"] = numbers[0]["long_name"]
-        return defaults
+    def get_street_number(details: dict or ComponentIndex) -> dict:
+        return ComponentIndex.of(details).get_long_names(
+            "street_number", "street_number"
+        )
 
     @staticmethod
-    def get_floor(details: dict) -> dict:
-        defaults = {}
-        for lang in settings.MODELTRANSLATION_LANGUAGES:
-            numbers = list(
-                filter(
-                    lambda x: x if "floor" in x["types"] else None,
-                    details[lang]["address_components"],
-                )
-            )
-            if numbers:
-                defaults[f"floor_{lang}"] = numbers[0]["long_name"]
-        return defaults
+    def get_floor(details: dict or ComponentIndex) -> dict:
+        return ComponentIndex.of(details).get_long_names("floor", "floor")
 
     @staticmethod
-    def get_room(details: dict) -> dict:
-        defaults = {}
-        for lang in settings.MODELTRANSLATION_LANGUAGES:
-            numbers = list(
-                filter(
-                    lambda x: x if "room" in x["types"] else None,
-                    details[lang]["address_components"],
-                )
-            )
-            if numbers:
-                defaults[f"room_{lang}"] = numbers[0]["long_name"]
-        return defaults
+    def get_room(details: dict or ComponentIndex) -> dict:
+        return ComponentIndex.of(details).get_long_names("room", "room")
 
     @staticmethod
-    def get_postal_code(details: dict) -> str:
-        postal = list(
-            filter(
-                lambda x: x if "postal_code" in x["types"] else None,
-                details["en"]["address_components"],
-            )
-        )
-        if postal:
-            return postal[0]["long_name"]
+    def get_postal_code(details: dict or ComponentIndex) -> str:
+        postal = ComponentIndex.of(details).get("en", "postal_code")
+        if postal is not None:
+            return postal.long_name
         return ""
 
     @staticmethod
@@ -335,8 +907,214 @@ class Place(models.Model):
     postal_code = models.CharField(max_length=20, blank=True)
     latitude = models.DecimalField(max_digits=11, decimal_places=8)
     longitude = models.DecimalField(max_digits=11, decimal_places=8)
+    fetched_at = models.DateTimeField(blank=True, null=True, db_index=True)
 
     objects = PlaceManager()
 
     def __str__(self):
         return self.formatted_address
+
+
+class AddressQueryManager(models.Manager):
+    @staticmethod
+    def normalize(address: str) -> str:
+        return " ".join(address.split()).casefold()
+
+    def make_hash(self, address: str) -> str:
+        normalized = self.normalize(address)
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    @staticmethod
+    def get_touch_interval() -> datetime.timedelta:
+        return datetime.timedelta(
+            seconds=getattr(
+                settings, "GOOGLE_PLACES_QUERY_TOUCH_INTERVAL", 5 * 60
+            )
+        )
+
+    def get_touched(self, queries: Iterable["AddressQuery"]) -> List[int]:
+        """
+        Return the pks of the queries whose hit accounting is due: the
+        ones last seen GOOGLE_PLACES_QUERY_TOUCH_INTERVAL seconds ago or
+        earlier, so popular addresses are not written on every read.
+        """
+        threshold = timezone.now() - self.get_touch_interval()
+        return [query.pk for query in queries if query.last_seen <= threshold]
+
+    def touch(self, pks: List[int]):
+        if pks:
+            self.filter(pk__in=pks).update(
+                hits=F("hits") + 1, last_seen=timezone.now()
+            )
+
+    def lookup(self, address: str) -> Place or None:
+        try:
+            query = self.select_related("place").get(
+                query_hash=self.make_hash(address)
+            )
+        except self.model.DoesNotExist:
+            return None
+
+        self.touch(self.get_touched([query]))
+        return query.place
+
+    async def alookup(self, address: str) -> Place or None:
+        try:
+            query = await self.select_related("place").aget(
+                query_hash=self.make_hash(address)
+            )
+        except self.model.DoesNotExist:
+            return None
+
+        if self.get_touched([query]):
+            await self.filter(pk=query.pk).aupdate(
+                hits=F("hits") + 1, last_seen=timezone.now()
+            )
+        return query.place
+
+    def lookup_many(self, addresses: Iterable[str]) -> Dict[str, Place]:
+        """
+        Return Places of the known addresses mapped by normalized query.
+        """
+        hashes = {self.make_hash(address) for address in addresses}
+        queries = list(
+            self.select_related("place").filter(query_hash__in=hashes)
+        )
+        self.touch(self.get_touched(queries))
+        return {query.query: query.place for query in queries}
+
+    def remember(self, address: str, place: Place):
+        """
+        Map the address to the place: update the existing query, or
+        insert it, ignoring a concurrent insert of the same address.
+        """
+        query_hash = self.make_hash(address)
+        now = timezone.now()
+        if not self.filter(query_hash=query_hash).update(
+            place=place, last_seen=now
+        ):
+            self.bulk_create(
+                [
+                    self.model(
+                        query_hash=query_hash,
+                        query=self.normalize(address),
+                        place=place,
+                        last_seen=now,
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+
+    async def aremember(self, address: str, place: Place):
+        query_hash = self.make_hash(address)
+        now = timezone.now()
+        if not await self.filter(query_hash=query_hash).aupdate(
+            place=place, last_seen=now
+        ):
+            await self.abulk_create(
+                [
+                    self.model(
+                        query_hash=query_hash,
+                        query=self.normalize(address),
+                        place=place,
+                        last_seen=now,
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+
+    @property
+    def unresolved_cache(self):
+        return caches[settings.GOOGLE_PLACES_WRAPPER_CACHE_NAME]
+
+    def make_unresolved_key(self, address: str) -> str:
+        prefix = getattr(settings, "GOOGLE_PLACES_CACHE_KEY_PREFIX", "places")
+        return f"{prefix}:unresolved:{self.make_hash(address)}"
+
+    @staticmethod
+    def get_unresolved_timeout() -> int:
+        return getattr(
+            settings, "GOOGLE_PLACES_NEGATIVE_CACHING_TIME", 60 * 60
+        )
+
+    def is_unresolved(self, address: str) -> bool:
+        """
+        Tell whether the address recently failed to resolve to a Place.
+        """
+        key = self.make_unresolved_key(address)
+        return self.unresolved_cache.get(key) is not None
+
+    async def ais_unresolved(self, address: str) -> bool:
+        key = self.make_unresolved_key(address)
+        return await self.unresolved_cache.aget(key) is not None
+
+    def unresolved_many(self, addresses: Iterable[str]) -> Set[str]:
+        """
+        Return normalized queries of the addresses that recently failed to
+        resolve.
+        """
+        keys = {
+            self.make_unresolved_key(address): self.normalize(address)
+            for address in addresses
+        }
+        if not keys:
+            return set()
+        return {keys[key] for key in self.unresolved_cache.get_many(keys)}
+
+    def remember_unresolved(self, address: str):
+        self.unresolved_cache.set(
+            self.make_unresolved_key(address),
+            1,
+            self.get_unresolved_timeout(),
+        )
+
+    async def aremember_unresolved(self, address: str):
+        await self.unresolved_cache.aset(
+            self.make_unresolved_key(address),
+            1,
+            self.get_unresolved_timeout(),
+        )
+
+    def remember_unresolved_many(self, addresses: Iterable[str]):
+        keys = {self.make_unresolved_key(address): 1 for address in addresses}
+        if keys:
+            self.unresolved_cache.set_many(keys, self.get_unresolved_timeout())
+
+    def remember_many(self, items: Iterable[Tuple[str, Place]]):
+        now = timezone.now()
+        self.bulk_create(
+            [
+                self.model(
+                    query_hash=self.make_hash(address),
+                    query=self.normalize(address),
+                    place=place,
+                    last_seen=now,
+                )
+                for address, place in items
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class AddressQuery(models.Model):
+    """
+    Durable mapping of a normalized address query to the resolved Place,
+    so repeat addresses skip the find_place call entirely.
+    """
+
+    query_hash = models.CharField(max_length=64, unique=True)
+    query = models.TextField()
+    place = models.ForeignKey(
+        Place, related_name="queries", on_delete=models.CASCADE
+    )
+    hits = models.PositiveIntegerField(default=0)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    objects = AddressQueryManager()
+
+    class Meta:
+        verbose_name = "address query"
+        verbose_name_plural = "address queries"
+
+    def __str__(self):
+        return self.query
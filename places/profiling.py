@@ -0,0 +1,195 @@
+"""
+Per-stage timings of ``Place.objects.get_details`` calls.
+
+Profiling is off unless a callback is given, either for a block of code::
+
+    with profiling.profile(print):
+        Place.objects.get_details(address)
+
+or for the whole process with GOOGLE_PLACES_PROFILE_CALLBACK, the dotted
+path of a callable like ``places.profiling.log_profile`` or
+``places.profiling.report_profile``. The callback gets a ``Profile`` per
+call with the time spent and the SQL queries run by the default database
+connection in each stage. When profiling is off a stage costs a context
+variable lookup.
+"""
+import contextlib
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from places.metrics import get_metrics_backend
+
+logger = logging.getLogger(__name__)
+
+_callback = ContextVar("places_profile_callback", default=None)
+_current = ContextVar("places_profile", default=None)
+
+NOT_PROFILED = contextlib.nullcontext()
+
+
+class Stage:
+    __slots__ = ("seconds", "queries", "calls")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+        self.calls = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "seconds": self.seconds,
+            "queries": self.queries,
+            "calls": self.calls,
+        }
+
+
+class Profile:
+    """
+    Timings of one profiled call: the total and per stage, in the order
+    the stages first ran. Time of nested stages also counts for the
+    enclosing one, queries count for the innermost stage only.
+    """
+
+    def __init__(self, name: str, address: str):
+        self.name = name
+        self.address = address
+        self.seconds = 0.0
+        self.queries = 0
+        self.stages: Dict[str, Stage] = {}
+        self._running = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        stage = self.stages.setdefault(name, Stage())
+        self._running.append(stage)
+        started = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - started
+            stage.calls += 1
+            self._running.pop()
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        if self._running:
+            self._running[-1].queries += 1
+        return execute(sql, params, many, context)
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "address": self.address,
+            "seconds": self.seconds,
+            "queries": self.queries,
+            "stages": {
+                name: stage.as_dict() for name, stage in self.stages.items()
+            },
+        }
+
+    def __str__(self):
+        stages = ", ".join(
+            f"{name} {stage.seconds * 1000:.1f}ms/{stage.queries}q"
+            for name, stage in self.stages.items()
+        )
+        return (
+            f"{self.name}({self.address!r}) {self.seconds * 1000:.1f}ms/"
+            f"{self.queries}q: {stages}"
+        )
+
+
+@functools.lru_cache()
+def load_callback(path: str) -> Callable:
+    return import_string(path)
+
+
+def get_callback() -> Callable or None:
+    callback = _callback.get()
+    if callback is None:
+        path = getattr(settings, "GOOGLE_PLACES_PROFILE_CALLBACK", None)
+        if path is not None:
+            callback = load_callback(path)
+    return callback
+
+
+@contextlib.contextmanager
+def profile(callback: Callable):
+    """
+    Profile the calls made in the block, passing each Profile to
+    ``callback``.
+    """
+    token = _callback.set(callback)
+    try:
+        yield
+    finally:
+        _callback.reset(token)
+
+
+def profiled(name: str):
+    """
+    Decorate a manager method taking an address so its calls are
+    profiled. Calls made while another is profiled count as its stages.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, address, *args, **kwargs):
+            if _current.get() is not None:
+                with stage(name):
+                    return method(self, address, *args, **kwargs)
+            callback = get_callback()
+            if callback is None:
+                return method(self, address, *args, **kwargs)
+
+            current = Profile(name, address)
+            token = _current.set(current)
+            started = time.perf_counter()
+            try:
+                with connection.execute_wrapper(current.count_query):
+                    return method(self, address, *args, **kwargs)
+            finally:
+                current.seconds = time.perf_counter() - started
+                _current.reset(token)
+                callback(current)
+
+        return wrapper
+
+    return decorator
+
+
+def stage(name: str):
+    """
+    Time the block as the ``name`` stage of the profiled call, if any.
+    """
+    current = _current.get()
+    if current is None:
+        return NOT_PROFILED
+    return current.stage(name)
+
+
+def log_profile(profile: Profile):
+    """
+    Log the profile to the places.profiling logger.
+    """
+    logger.info("%s", profile, extra={"profile": profile.as_dict()})
+
+
+def report_profile(profile: Profile):
+    """
+    Send the profile to the GOOGLE_PLACES_METRICS_BACKEND backend: the
+    ``<name>`` timing, and the ``<name>.stage`` timings and
+    ``<name>.queries`` counters tagged with the stage.
+    """
+    metrics = get_metrics_backend()
+    metrics.timing(profile.name, profile.seconds)
+    for name, timings in profile.stages.items():
+        tags = {"stage": name}
+        metrics.timing(f"{profile.name}.stage", timings.seconds, tags)
+        metrics.incr(f"{profile.name}.queries", timings.queries, tags)
@@ -0,0 +1,34 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing ``rate`` acquisitions per second on
+    average and bursts of up to ``burst``.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """
+        Block until ``tokens`` tokens are available and take them.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._updated_at) * self.rate,
+                )
+                self._updated_at = now
+                if self._tokens >= min(tokens, self.burst):
+                    self._tokens -= tokens
+                    return
+                wait = (min(tokens, self.burst) - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,193 @@
+"""
+Record/replay stand-in for ``googlemaps.Client``, to run the resolution
+pipeline without network access.
+"""
+import atexit
+import copy
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from googlemaps import Client
+from googlemaps.exceptions import ApiError
+
+from places.wrappers import (
+    AsyncCacheableWrapper,
+    CacheableWrapper,
+    bind_arguments,
+    canonical_dumps,
+)
+
+FORMAT_VERSION = 1
+
+
+class ReplayClient:
+    """
+    Answer ``googlemaps.Client`` method calls from stored responses keyed
+    by the method and its canonical arguments.
+
+    Calls without a stored response are passed to ``client`` when it is
+    given and recorded, to ``fallback(name, arguments)`` otherwise, and
+    raise ``LookupError`` without either. Every call sleeps ``latency``
+    seconds give or take up to ``jitter`` seconds, and is counted per
+    method in ``calls``.
+    """
+
+    def __init__(
+        self,
+        entries: dict = None,
+        client: Client = None,
+        fallback: Callable = None,
+        latency: float = 0,
+        jitter: float = 0,
+        seed=None,
+    ):
+        self.entries = dict(entries or {})
+        self.client = client
+        self.fallback = fallback
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = Counter()
+        self.misses = Counter()
+        self._random = random.Random(seed)
+        self._signatures = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "ReplayClient":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["entries"], **kwargs)
+
+    def save(self, path: str):
+        with self._lock:
+            data = {"version": FORMAT_VERSION, "entries": self.entries}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        signature = self._get_signature(name)
+
+        def replay(*args, **kwargs):
+            return self.call(name, args, kwargs)
+
+        replay.__name__ = name
+        if signature is not None:
+            replay.__signature__ = signature
+        return replay
+
+    def _get_signature(self, name: str) -> inspect.Signature or None:
+        if name not in self._signatures:
+            method = getattr(Client, name, None)
+            signature = None
+            if callable(method):
+                signature = inspect.signature(method)
+                # Drop the client parameter of the googlemaps functions.
+                parameters = list(signature.parameters.values())[1:]
+                signature = signature.replace(parameters=parameters)
+            self._signatures[name] = signature
+        return self._signatures[name]
+
+    def make_key(self, name: str, args: tuple, kwargs: dict) -> str:
+        arguments = bind_arguments(self._get_signature(name), args, kwargs)
+        return f"{name}:{canonical_dumps(arguments)}"
+
+    def call(self, name: str, args: tuple, kwargs: dict):
+        key = self.make_key(name, args, kwargs)
+        with self._lock:
+            self.calls[name] += 1
+            delay = self.latency
+            if self.jitter:
+                delay += self._random.uniform(-self.jitter, self.jitter)
+            entry = self.entries.get(key)
+        if delay > 0:
+            time.sleep(delay)
+
+        if entry is None:
+            entry = self._miss(name, key, args, kwargs)
+        if "error" in entry:
+            raise ApiError(**entry["error"])
+        # Callers own their responses, as with the real client.
+        return copy.deepcopy(entry["response"])
+
+    def _miss(self, name: str, key: str, args: tuple, kwargs: dict) -> dict:
+        if self.client is not None:
+            try:
+                entry = {
+                    "response": getattr(self.client, name)(*args, **kwargs)
+                }
+            except ApiError as e:
+                entry = {"error": {"status": e.status, "message": e.message}}
+        elif self.fallback is not None:
+            arguments = bind_arguments(self._get_signature(name), args, kwargs)
+            entry = {"response": self.fallback(name, arguments)}
+        else:
+            raise LookupError(f"No recorded response for {key}")
+
+        with self._lock:
+            self.misses[name] += 1
+            self.entries[key] = entry
+        return entry
+
+
+def from_settings() -> ReplayClient:
+    """
+    Build a ReplayClient from settings, for
+    ``GOOGLE_PLACES_CLIENT = "places.replay.from_settings"``.
+
+    Responses are read from ``GOOGLE_PLACES_REPLAY_FILE``. With
+    ``GOOGLE_PLACES_REPLAY_RECORD`` on, missing responses are fetched from
+    Google and the file is rewritten when the process exits.
+    """
+    path = getattr(settings, "GOOGLE_PLACES_REPLAY_FILE", None)
+    options = {
+        "latency": getattr(settings, "GOOGLE_PLACES_REPLAY_LATENCY", 0),
+        "jitter": getattr(settings, "GOOGLE_PLACES_REPLAY_JITTER", 0),
+    }
+    if getattr(settings, "GOOGLE_PLACES_REPLAY_RECORD", False):
+        options["client"] = Client(key=settings.GOOGLE_PLACES_API_KEY)
+
+    if path is not None and os.path.exists(path):
+        client = ReplayClient.load(path, **options)
+    elif "client" in options:
+        client = ReplayClient(**options)
+    else:
+        raise ImproperlyConfigured(
+            "GOOGLE_PLACES_REPLAY_FILE must name a recorded file unless "
+            "GOOGLE_PLACES_REPLAY_RECORD is on."
+        )
+    if path is not None and "client" in options:
+        atexit.register(client.save, path)
+    return client
+
+
+@contextmanager
+def install(client):
+    """
+    Route ``PlaceManager`` calls through ``client``, behind new cache
+    wrappers, while the block runs.
+    """
+    from places import models
+
+    saved = models.gmaps, models.cacheable_gmaps, models.async_cacheable_gmaps
+    models.gmaps = client
+    models.cacheable_gmaps = CacheableWrapper(client)
+    models.async_cacheable_gmaps = AsyncCacheableWrapper(client)
+    try:
+        yield client
+    finally:
+        (
+            models.gmaps,
+            models.cacheable_gmaps,
+            models.async_cacheable_gmaps,
+        ) = saved
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+
+from places.components import component_cache
+from places.models import COMPONENT_MODELS
+
+
+def invalidate_saved_component(sender, instance, created, **kwargs):
+    if not created:
+        component_cache.invalidate(sender, instance.pk)
+
+
+def invalidate_deleted_component(sender, instance, **kwargs):
+    component_cache.invalidate(sender, instance.pk)
+
+
+def connect():
+    """
+    Connect the receivers to the component models only, so saves and
+    deletes of other models, and their fast deletes, are not affected.
+    """
+    for model in COMPONENT_MODELS.values():
+        post_save.connect(
+            invalidate_saved_component,
+            sender=model,
+            dispatch_uid=f"places_{model._meta.model_name}_saved",
+        )
+        post_delete.connect(
+            invalidate_deleted_component,
+            sender=model,
+            dispatch_uid=f"places_{model._meta.model_name}_deleted",
+        )
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from places.components import component_cache
+from places.models import COMPONENT_MODELS, AddressQuery, Place
+from places.wrappers import CacheableWrapper
+
+
+class QueryBudgetMixin:
+    @contextmanager
+    def assertMaxQueries(self, budget, using="default"):
+        """
+        Fail when the block runs more than budget SQL statements.
+        """
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        if len(context) > budget:
+            queries = "\n".join(
+                f"{n}. {query['sql']}"
+                for n, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f"{len(context)} queries executed, budget is {budget}:\n"
+                f"{queries}"
+            )
+
+
+def place_response(place_id, language, fields=None):
+    components = [
+        {
+            "long_name": f"{place_id} {key} {language}",
+            "short_name": f"{key} {language}",
+            "types": [key, "political"],
+        }
+        for key in COMPONENT_MODELS
+    ]
+    components.append(
+        {"long_name": "Spain", "short_name": "ES", "types": ["country"]}
+    )
+    return {
+        "status": "OK",
+        "result": {
+            "formatted_address": f"{place_id} ({language})",
+            "address_components": components,
+            "geometry": {"location": {"lat": 40.4, "lng": -3.7}},
+        },
+    }
+
+
+class FullPlaceClient:
+    def find_place(self, input, input_type, **kwargs):
+        return {"status": "OK", "candidates": [{"place_id": f"id:{input}"}]}
+
+    def place(self, place_id, language, fields=None):
+        return place_response(place_id, language)
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class GetDetailsQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    Number of SQL statements of each get_details path, with every
+    component type present. Raise a budget only together with the change
+    that needs the extra round trip.
+
+    Budgets include the SAVEPOINT statements that transaction.atomic()
+    runs inside the test transaction.
+    """
+
+    # AddressQuery.objects.remember: the update of an existing query and
+    # the insert of a new one.
+    REMEMBER = 2
+
+    def setUp(self):
+        component_cache.clear()
+        caches["locmem"].clear()
+        self.gmaps_patcher = patch(
+            "places.models.cacheable_gmaps",
+            CacheableWrapper(FullPlaceClient()),
+        )
+        self.gmaps_patcher.start()
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+
+    def test_known_address(self):
+        Place.objects.get_details("Gran Via 1")
+
+        # Lookup of the AddressQuery with its Place, hits are counted at
+        # most once per GOOGLE_PLACES_QUERY_TOUCH_INTERVAL.
+        with self.assertMaxQueries(1):
+            place = Place.objects.get_details("Gran Via 1")
+
+        self.assertEqual(place.place_id, "id:Gran Via 1")
+
+    def test_existing_place(self):
+        place = Place.objects.get_details("Gran Via 1")
+        AddressQuery.objects.all().delete()
+
+        # AddressQuery and Place lookups.
+        with self.assertMaxQueries(2 + self.REMEMBER):
+            self.assertEqual(Place.objects.get_details("Gran Via 1"), place)
+
+    def test_new_place(self):
+        # Lookups as above, then in one savepoint a lookup, an insert and
+        # a read back per component model, and the Place insert.
+        budget = 2 + 2 + 3 * len(COMPONENT_MODELS) + 1 + self.REMEMBER
+        with self.assertMaxQueries(budget):
+            place = Place.objects.get_details("Gran Via 1")
+
+        self.assertEqual(
+            place.locality.long_name_en, "id:Gran Via 1 locality en"
+        )
+
+    @override_settings(GOOGLE_PLACES_COMPONENT_CACHE_SIZE=100)
+    def test_new_place_with_cached_components(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Place.objects.get_details("Gran Via 1")
+        Place.objects.all().delete()
+        AddressQuery.objects.all().delete()
+
+        # Components resolve from memory, only the Place is inserted.
+        with self.assertMaxQueries(2 + 3 + self.REMEMBER):
+            Place.objects.get_details("Gran Via 1")
+
+
+class AdminQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    Changelist rendering must not run queries per row: the session and
+    user lookups, two counts and the page of rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "", "password")
+        with patch(
+            "places.models.cacheable_gmaps",
+            CacheableWrapper(FullPlaceClient()),
+        ):
+            for n in range(20):
+                Place.objects.get_details(f"Gran Via {n}")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def assertChangelistBudget(self, model, budget):
+        url = reverse(f"admin:places_{model._meta.model_name}_changelist")
+        with self.assertMaxQueries(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_place_changelist(self):
+        self.assertChangelistBudget(Place, 5)
+
+    def test_address_query_changelist(self):
+        self.assertChangelistBudget(AddressQuery, 5)
+
+    def test_component_changelist(self):
+        self.assertChangelistBudget(COMPONENT_MODELS["locality"], 5)
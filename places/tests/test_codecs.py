@@ -0,0 +1,73 @@
+import pickle
+from unittest import TestCase
+
+from places.codecs import JSONCodec, PickleCodec, Serializer, ZlibCompressor
+
+RESPONSE = {
+    "status": "OK",
+    "result": {
+        "formatted_address": "Av. Gabriel Bernabé, Alhaurín de la Torre",
+        "address_components": [
+            {"long_name": "Málaga", "short_name": "MA", "types": ["a"]}
+        ]
+        * 50,
+    },
+}
+
+
+class SerializerTests(TestCase):
+    def test_roundtrip(self):
+        for codec in ("pickle", "json"):
+            for compression in (None, "zlib", "lzma"):
+                serializer = Serializer(codec, compression, min_size=100)
+
+                data = serializer.dumps(RESPONSE)
+
+                self.assertEqual(serializer.loads(data), RESPONSE)
+
+    def test_header(self):
+        data = Serializer("json").dumps(RESPONSE)
+
+        self.assertEqual(data[0], JSONCodec.id)
+        self.assertEqual(JSONCodec.loads(data[1:]), RESPONSE)
+
+    def test_compress_above_min_size(self):
+        serializer = Serializer("json", "zlib", min_size=100)
+
+        small = serializer.dumps({"status": "OK"})
+        large = serializer.dumps(RESPONSE)
+
+        self.assertEqual(small[0], JSONCodec.id)
+        self.assertEqual(large[0], JSONCodec.id | ZlibCompressor.id)
+        self.assertLess(len(large), len(Serializer("json").dumps(RESPONSE)))
+
+    def test_payload_size(self):
+        serializer = Serializer("json", "zlib", min_size=100)
+        payload = JSONCodec.dumps(RESPONSE)
+
+        data, size = serializer.encode(RESPONSE)
+
+        self.assertEqual(size, len(payload))
+        self.assertEqual(serializer.decode(data), (RESPONSE, len(payload)))
+
+    def test_fall_back_to_pickle(self):
+        error = ValueError("boom")
+
+        data = Serializer("json").dumps(error)
+
+        self.assertEqual(data[0], PickleCodec.id)
+        self.assertIsInstance(Serializer("json").loads(data), ValueError)
+
+    def test_read_other_settings(self):
+        data = Serializer("json", "lzma", min_size=0).dumps(RESPONSE)
+
+        self.assertEqual(Serializer().loads(data), RESPONSE)
+
+    def test_read_legacy_pickle(self):
+        data = pickle.dumps(RESPONSE)
+
+        self.assertEqual(Serializer("json", "zlib").loads(data), RESPONSE)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(KeyError):
+            Serializer("yaml")
@@ -0,0 +1,224 @@
+from unittest.mock import patch
+
+from django.contrib.sessions.models import Session
+from django.db import IntegrityError, transaction
+from django.db.models.deletion import Collector
+from django.test import TestCase, override_settings
+
+from places.components import ComponentCache, component_cache, make_name_hash
+from places.models import (
+    AdministrativeAreaLevel1,
+    Locality,
+    Place,
+    PlaceManager,
+)
+
+
+def details(name):
+    return {
+        lang: {
+            "address_components": [
+                {
+                    "types": ["locality", "political"],
+                    "long_name": f"{name} {lang}",
+                    "short_name": f"{name[:3]} {lang}",
+                }
+            ]
+        }
+        for lang in ("en", "ru", "es")
+    }
+
+
+def names(name):
+    return {
+        field: value
+        for lang in ("en", "ru", "es")
+        for field, value in (
+            (f"long_name_{lang}", f"{name} {lang}"),
+            (f"short_name_{lang}", f"{name[:3]} {lang}"),
+        )
+    }
+
+
+def get_locality(name):
+    return PlaceManager.get_component_object(
+        Locality, "locality", details(name)
+    )
+
+
+@override_settings(GOOGLE_PLACES_COMPONENT_CACHE_SIZE=2)
+class ComponentCacheTests(TestCase):
+    def setUp(self):
+        component_cache.clear()
+
+    def create_locality(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return get_locality(name)
+
+    def test_repeat_component_without_queries(self):
+        locality = self.create_locality("Moscow")
+
+        with self.assertNumQueries(0):
+            cached = get_locality("Moscow")
+
+        self.assertEqual(cached.pk, locality.pk)
+        self.assertEqual(cached.long_name_ru, "Moscow ru")
+        self.assertFalse(cached._state.adding)
+
+    def test_rolled_back_rows_are_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            get_locality("Moscow")
+
+        with self.assertNumQueries(1):
+            get_locality("Moscow")
+
+    def test_existing_rows_are_cached(self):
+        Locality.objects.create(
+            long_name_en="Moscow en",
+            short_name_en="Mos en",
+            long_name_ru="Moscow ru",
+            short_name_ru="Mos ru",
+            long_name_es="Moscow es",
+            short_name_es="Mos es",
+        )
+        get_locality("Moscow")
+
+        with self.assertNumQueries(0):
+            get_locality("Moscow")
+
+    def test_least_recently_used_are_evicted(self):
+        self.create_locality("Moscow")
+        self.create_locality("Madrid")
+        get_locality("Moscow")
+        self.create_locality("Boston")
+
+        with self.assertNumQueries(0):
+            get_locality("Moscow")
+        with self.assertNumQueries(1):
+            get_locality("Madrid")
+
+    def test_models_do_not_share_entries(self):
+        self.create_locality("Moscow")
+
+        area = PlaceManager.get_component_object(
+            AdministrativeAreaLevel1, "locality", details("Moscow")
+        )
+
+        self.assertIsInstance(area, AdministrativeAreaLevel1)
+        self.assertEqual(AdministrativeAreaLevel1.objects.count(), 1)
+
+    def test_invalidate_on_update(self):
+        locality = self.create_locality("Moscow")
+        locality = Locality.objects.get(pk=locality.pk)
+        locality.long_name_en = "Moskva en"
+        locality.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = get_locality("Moscow")
+
+        self.assertNotEqual(fresh.pk, locality.pk)
+
+    def test_invalidate_on_delete(self):
+        locality = self.create_locality("Moscow")
+        Locality.objects.get(pk=locality.pk).delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = get_locality("Moscow")
+
+        self.assertTrue(Locality.objects.filter(pk=fresh.pk).exists())
+
+    def test_warm(self):
+        with override_settings(GOOGLE_PLACES_COMPONENT_CACHE_SIZE=0):
+            get_locality("Moscow")
+
+        self.assertEqual(Place.objects.warm_component_cache(), 1)
+        with self.assertNumQueries(0):
+            get_locality("Moscow")
+
+    def test_get_or_create_many(self):
+        existing = self.create_locality("Moscow")
+        names_list = [names("Moscow"), names("Madrid"), names("Madrid")]
+
+        # One lookup, one insert of the missing rows and their read back.
+        with self.assertNumQueries(3):
+            rows = component_cache.get_or_create_many(Locality, names_list)
+
+        self.assertEqual(len(rows), 2)
+        moscow = rows[component_cache.make_key(Locality, names("Moscow"))]
+        madrid = rows[component_cache.make_key(Locality, names("Madrid"))]
+        self.assertEqual(moscow.pk, existing.pk)
+        self.assertEqual(madrid.long_name_en, "Madrid en")
+        self.assertEqual(madrid.name_hash, make_name_hash(names("Madrid")))
+        self.assertEqual(Locality.objects.count(), 2)
+
+    def test_get_or_create_many_uses_the_cache(self):
+        self.create_locality("Moscow")
+
+        with self.assertNumQueries(0):
+            rows = component_cache.get_or_create_many(
+                Locality, [names("Moscow")]
+            )
+
+        self.assertEqual(len(rows), 1)
+
+    def test_get_or_create_many_skips_concurrent_inserts(self):
+        other = Locality.objects.create(**names("Moscow"))
+        find = ComponentCache._find
+        calls = []
+
+        def find_after_insert(cache, *args):
+            # The row appears between the lookup and the insert.
+            calls.append(args)
+            return {} if len(calls) == 1 else find(cache, *args)
+
+        with patch.object(ComponentCache, "_find", find_after_insert):
+            rows = component_cache.get_or_create_many(
+                Locality, [names("Moscow")]
+            )
+
+        self.assertEqual(list(rows.values())[0].pk, other.pk)
+        self.assertEqual(Locality.objects.count(), 1)
+
+    def test_other_models_keep_fast_delete(self):
+        collector = Collector(using="default")
+
+        self.assertTrue(collector.can_fast_delete(Session.objects.all()))
+        self.assertFalse(collector.can_fast_delete(Locality.objects.all()))
+
+    @override_settings(GOOGLE_PLACES_COMPONENT_CACHE_SIZE=0)
+    def test_disabled(self):
+        self.create_locality("Moscow")
+
+        with self.assertNumQueries(1):
+            get_locality("Moscow")
+        self.assertEqual(Place.objects.warm_component_cache(), 0)
+
+
+class AddressComponentNameHashTests(TestCase):
+    def test_save_sets_name_hash(self):
+        locality = Locality.objects.create(**names("Moscow"))
+
+        self.assertEqual(locality.name_hash, make_name_hash(names("Moscow")))
+
+    def test_name_hash_follows_names(self):
+        locality = Locality.objects.create(**names("Moscow"))
+        locality.long_name_en = "Madrid en"
+        locality.save(update_fields=["long_name_en"])
+
+        locality.refresh_from_db()
+        self.assertEqual(
+            locality.name_hash,
+            make_name_hash({**names("Moscow"), "long_name_en": "Madrid en"}),
+        )
+
+    def test_names_are_unique(self):
+        Locality.objects.create(**names("Moscow"))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Locality.objects.create(**names("Moscow"))
+
+    def test_missing_and_blank_names_are_equal(self):
+        self.assertEqual(
+            make_name_hash({"long_name_en": "Moscow", "short_name_ru": None}),
+            make_name_hash({"long_name_en": " Moscow ", "short_name_ru": ""}),
+        )
@@ -0,0 +1,78 @@
+from django.test import SimpleTestCase
+
+from places.details import ComponentIndex
+
+
+def component(long_name, short_name, *types):
+    return {"long_name": long_name, "short_name": short_name, "types": types}
+
+
+class ComponentIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.details = {
+            "en": {
+                "address_components": [
+                    component("Moscow", "Moscow", "locality", "political"),
+                    component("Russia", "RU", "country", "political"),
+                    component("Duplicate", "Duplicate", "locality"),
+                ]
+            },
+            "ru": {
+                "address_components": [
+                    component("Москва", "Москва", "locality", "political"),
+                ]
+            },
+        }
+
+    def test_get(self):
+        index = ComponentIndex(self.details)
+
+        self.assertEqual(index.get("en", "country").short_name, "RU")
+        self.assertEqual(index.get("ru", "locality").long_name, "Москва")
+        self.assertIsNone(index.get("ru", "country"))
+
+    def test_first_component_of_a_type_wins(self):
+        index = ComponentIndex(self.details)
+
+        self.assertEqual(index.get("en", "locality").long_name, "Moscow")
+
+    def test_components_share_types(self):
+        index = ComponentIndex(self.details)
+
+        self.assertIs(index.get("en", "locality"), index["en"]["political"])
+
+    def test_languages_are_indexed_on_first_read(self):
+        index = ComponentIndex({"en": self.details["en"]})
+
+        self.assertEqual(index.get("en", "country").short_name, "RU")
+        with self.assertRaises(KeyError):
+            index["ru"]
+
+    def test_get_names(self):
+        self.details["es"] = {"address_components": []}
+        index = ComponentIndex(self.details)
+
+        self.assertEqual(
+            index.get_names("locality"),
+            {
+                "long_name_en": "Moscow",
+                "short_name_en": "Moscow",
+                "long_name_ru": "Москва",
+                "short_name_ru": "Москва",
+            },
+        )
+
+    def test_get_long_names(self):
+        self.details["es"] = {"address_components": []}
+        index = ComponentIndex(self.details)
+
+        self.assertEqual(
+            index.get_long_names("locality", "city"),
+            {"city_en": "Moscow", "city_ru": "Москва"},
+        )
+
+    def test_of(self):
+        index = ComponentIndex(self.details)
+
+        self.assertIs(ComponentIndex.of(index), index)
+        self.assertEqual(ComponentIndex.of(self.details).details, self.details)
@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from places.models import Place
+from places.tests.test_models import place_response
+
+
+def create_places(count):
+    return [
+        Place.objects.create_from_details(
+            f"place {n}",
+            {
+                lang: place_response(f"place {n}", lang)["result"]
+                for lang in ("en", "ru", "es")
+            },
+        )
+        for n in range(count)
+    ]
+
+
+class PlaceManagerExportMethodTest(TestCase):
+    def test_rows(self):
+        place = create_places(1)[0]
+
+        (row,) = Place.objects.export("ru")
+
+        self.assertEqual(row["pk"], place.pk)
+        self.assertEqual(row["place_id"], "place 0")
+        self.assertEqual(row["formatted_address"], "place 0 (ru)")
+        self.assertEqual(row["country"], "US")
+        self.assertEqual(row["locality"], "Locality ru")
+        self.assertEqual(row["locality_short_name"], "Loc ru")
+        self.assertEqual(row["route"], "Route ru")
+        self.assertIsNone(row["neighborhood"])
+        self.assertEqual(list(row), list(Place.objects.get_export_columns()))
+
+    def test_one_query_per_chunk(self):
+        create_places(5)
+
+        with self.assertNumQueries(3):
+            rows = list(Place.objects.export(chunk_size=2))
+
+        self.assertEqual(
+            [row["place_id"] for row in rows],
+            [f"place {n}" for n in range(5)],
+        )
+
+    def test_queryset(self):
+        create_places(3)
+
+        rows = Place.objects.export(
+            queryset=Place.objects.filter(place_id="place 1")
+        )
+
+        self.assertEqual([row["place_id"] for row in rows], ["place 1"])
+
+
+class PlacesExportCommandTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        create_places(3)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def export(self, *args):
+        call_command(
+            "places_export", *args, stdout=StringIO(), stderr=StringIO()
+        )
+
+    def test_jsonl_per_language(self):
+        output = os.path.join(self.dir.name, "places_{language}.jsonl")
+
+        self.export(f"--output={output}", "--chunk-size=2")
+
+        for lang in ("en", "ru", "es"):
+            with open(output.format(language=lang), encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f]
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(rows[2]["formatted_address"], f"place 2 ({lang})")
+            self.assertEqual(rows[2]["latitude"], "40.70000000")
+
+    def test_csv(self):
+        output = os.path.join(self.dir.name, "places.csv")
+
+        self.export(f"--output={output}", "--format=csv", "--language=es")
+
+        with open(output, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["locality"], "Locality es")
+
+    def test_stdout(self):
+        out = StringIO()
+        err = StringIO()
+
+        call_command("places_export", "--language=en", stdout=out, stderr=err)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        self.assertIn("Exported 3 places to -", err.getvalue())
+
+    def test_stdout_defaults_to_first_language(self):
+        out = StringIO()
+        err = StringIO()
+
+        call_command("places_export", stdout=out, stderr=err)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]["formatted_address"], "place 0 (en)")
+        self.assertEqual(err.getvalue(), "Exported 3 places to -\n")
+
+    def test_several_languages_need_a_pattern(self):
+        with self.assertRaises(CommandError):
+            self.export("--output=places.jsonl")
@@ -0,0 +1,150 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from places.models import Place
+from places.tests.test_models import find_place_response, place_response
+from places.wrappers import CacheableWrapper
+
+
+class FakeClient:
+    def __init__(self):
+        self.addresses = []
+
+    def find_place(self, input, input_type):
+        self.addresses.append(input)
+        if input.startswith("broken"):
+            raise ValueError(input)
+        return find_place_response(input)
+
+    def place(self, place_id, language, fields=None):
+        return place_response(place_id, language)
+
+
+class PlacesImportCommandTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.dir.name, "results.jsonl")
+        self.client = FakeClient()
+        self.gmaps_patcher = patch(
+            "places.models.cacheable_gmaps", CacheableWrapper(self.client)
+        )
+        self.gmaps_patcher.start()
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+        self.dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        call_command(
+            "places_import",
+            path,
+            f"--output={self.output}",
+            *args,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        with open(self.output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_csv(self):
+        path = self.write(
+            "addresses.csv",
+            "id,address\n1,a street\n2,bad street\n3,\n4,broken street\n",
+        )
+
+        rows = self.run_import(path)
+
+        place = Place.objects.get(place_id="id:a street")
+        self.assertEqual(
+            rows[0],
+            {
+                "address": "a street",
+                "status": "resolved",
+                "place_id": "id:a street",
+                "pk": place.pk,
+            },
+        )
+        self.assertEqual(rows[1]["status"], "unresolved")
+        self.assertEqual(rows[2]["status"], "invalid")
+        self.assertEqual(rows[3]["status"], "error")
+        self.assertIn("broken street", rows[3]["error"])
+
+    def test_jsonl(self):
+        path = self.write(
+            "addresses.jsonl",
+            '{"street": "a street"}\n\n"b street"\n{"street": null}\n'
+            '{"street": \n',
+        )
+
+        rows = self.run_import(path, "--field=street")
+
+        self.assertEqual(
+            [row["status"] for row in rows],
+            ["resolved", "resolved", "invalid", "invalid"],
+        )
+
+    def test_resume_after_crash(self):
+        path = self.write(
+            "addresses.csv",
+            "address\n" + "".join(f"{n} street\n" for n in range(5)),
+        )
+        get_details_many = Place.objects.get_details_many
+        batches = []
+
+        def crash_on_second_batch(addresses, **kwargs):
+            batches.append(addresses)
+            if len(batches) == 2:
+                raise RuntimeError("crash")
+            return get_details_many(addresses, **kwargs)
+
+        with patch.object(
+            Place.objects, "get_details_many", crash_on_second_batch
+        ), self.assertRaises(RuntimeError):
+            self.run_import(path, "--batch-size=2")
+
+        self.client.addresses.clear()
+        rows = self.run_import(path, "--batch-size=2")
+
+        self.assertEqual(
+            [row["address"] for row in rows], [f"{n} street" for n in range(5)]
+        )
+        self.assertEqual(
+            self.client.addresses, [f"{n} street" for n in range(2, 5)]
+        )
+
+    def test_output_shorter_than_checkpoint(self):
+        path = self.write("addresses.csv", "address\na street\nb street\n")
+        self.run_import(path, "--batch-size=1")
+        with open(f"{self.output}.checkpoint") as f:
+            state = json.load(f)
+        state["records"] = 1
+        with open(f"{self.output}.checkpoint", "w") as f:
+            json.dump(state, f)
+
+        os.remove(self.output)
+        with self.assertRaisesMessage(CommandError, "missing"):
+            self.run_import(path)
+        with open(self.output, "wb") as f:
+            f.write(b"short")
+        with self.assertRaisesMessage(CommandError, "shorter"):
+            self.run_import(path)
+
+    def test_checkpoint_of_another_input(self):
+        first = self.write("first.csv", "address\na street\n")
+        second = self.write("second.csv", "address\nb street\n")
+        self.run_import(first)
+
+        with self.assertRaises(CommandError):
+            self.run_import(second)
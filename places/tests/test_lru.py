@@ -0,0 +1,122 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from places.lru import MISSING, LRUCache
+
+
+class LRUCacheTests(TestCase):
+    def test_get_missing_key(self):
+        cache = LRUCache(2)
+
+        self.assertIs(cache.get("key"), MISSING)
+        self.assertIsNone(cache.get("key", None))
+
+    def test_set_and_get(self):
+        cache = LRUCache(2)
+
+        cache.set("key", [])
+
+        self.assertEqual(cache.get("key"), [])
+        self.assertIn("key", cache)
+
+    def test_evict_least_recently_used_by_count(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_evict_by_size(self):
+        cache = LRUCache(10, max_bytes=10)
+        cache.set("a", 1, size=6)
+
+        cache.set("b", 2, size=6)
+
+        self.assertIs(cache.get("a"), MISSING)
+        self.assertEqual(cache.size, 6)
+
+    def test_skip_value_larger_than_limit(self):
+        cache = LRUCache(10, max_bytes=10)
+
+        cache.set("a", 1, size=11)
+
+        self.assertEqual(len(cache), 0)
+
+    def test_drop_replaced_value_larger_than_limit(self):
+        cache = LRUCache(10, max_bytes=10)
+        cache.set("a", 1, size=6)
+
+        cache.set("a", 2, size=11)
+
+        self.assertIs(cache.get("a"), MISSING)
+        self.assertEqual(cache.size, 0)
+
+    def test_replace_value(self):
+        cache = LRUCache(10, max_bytes=10)
+        cache.set("a", 1, size=6)
+
+        cache.set("a", 2, size=3)
+
+        self.assertEqual(cache.get("a"), 2)
+        self.assertEqual(cache.size, 3)
+
+    def test_expire(self):
+        cache = LRUCache(2, timeout=10)
+
+        with patch("places.lru.time.monotonic", return_value=100):
+            cache.set("a", 1)
+        with patch("places.lru.time.monotonic", return_value=109):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("places.lru.time.monotonic", return_value=110):
+            self.assertIs(cache.get("a"), MISSING)
+
+        self.assertEqual(len(cache), 0)
+
+    def test_delete_and_clear(self):
+        cache = LRUCache(10)
+        cache.set("a", 1, size=1)
+        cache.set("b", 2, size=1)
+
+        cache.delete("a")
+        self.assertIs(cache.get("a"), MISSING)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+    def test_delete_matching(self):
+        cache = LRUCache(10)
+        cache.set("a", 1, size=2)
+        cache.set("b", 2, size=3)
+        cache.set("c", 1, size=4)
+
+        cache.delete_matching(lambda key, value: value == 1)
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.size, 3)
+
+    def test_concurrent_access(self):
+        cache = LRUCache(50, max_bytes=100)
+
+        def work(offset):
+            for i in range(1000):
+                cache.set(offset + i, i, size=1)
+                cache.get(offset + i - 1)
+
+        threads = [
+            threading.Thread(target=work, args=(n * 1000,)) for n in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.size, 50)
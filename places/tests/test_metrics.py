@@ -0,0 +1,259 @@
+import asyncio
+from collections import Counter
+from unittest import skipUnless
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from places.metrics import (
+    MetricsBackend,
+    PrometheusBackend,
+    StatsdBackend,
+    get_metrics_backend,
+    load_backend,
+)
+from places.tests.test_wrappers import (
+    ApiErrorMock,
+    AsyncGoogleMapClientMock,
+    NegativeGoogleMapClientMock,
+)
+from places.wrappers import AsyncCacheableWrapper, CacheableWrapper
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+class RecordingBackend(MetricsBackend):
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = []
+        self.histograms = []
+
+    @staticmethod
+    def key(name, tags):
+        return (name, *sorted((tags or {}).items()))
+
+    def incr(self, name, value=1, tags=None):
+        self.counters[self.key(name, tags)] += value
+
+    def timing(self, name, seconds, tags=None):
+        self.timings.append((self.key(name, tags), seconds))
+
+    def histogram(self, name, value, tags=None):
+        self.histograms.append((self.key(name, tags), value))
+
+
+class ClientMock(NegativeGoogleMapClientMock):
+    def place(self, place_id):
+        self.calls += 1
+        return {"status": "OK", "result": {"place_id": place_id}}
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class CacheableWrapperMetricsTests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.backend = RecordingBackend()
+        self.client = CacheableWrapper(ClientMock())
+        self.client.metrics = self.backend
+
+    def test_hits_and_misses_per_method(self):
+        self.client.place("a")
+        self.client.place("a")
+        self.client.find_place("a")
+
+        self.assertEqual(
+            self.backend.counters,
+            {
+                ("cache.misses", ("method", "place")): 1,
+                ("cache.l2_hits", ("method", "place")): 1,
+                ("cache.misses", ("method", "find_place")): 1,
+            },
+        )
+
+    @override_settings(GOOGLE_PLACES_L1_MAX_ENTRIES=10)
+    def test_l1_hits(self):
+        client = CacheableWrapper(ClientMock())
+        client.metrics = self.backend
+        client.place("a")
+        client.place("a")
+
+        self.assertEqual(
+            self.backend.counters[("cache.l1_hits", ("method", "place"))], 1
+        )
+
+    def test_latency_and_value_size(self):
+        self.client.place("a")
+        self.client.place("a")
+
+        [(key, seconds)] = self.backend.timings
+        self.assertEqual(key, ("api.latency", ("method", "place")))
+        self.assertGreaterEqual(seconds, 0)
+        size = len(
+            self.client.serializer.dumps(
+                {"status": "OK", "result": {"place_id": "a"}}
+            )
+        )
+        self.assertEqual(
+            self.backend.histograms,
+            [(("cache.value_bytes", ("method", "place")), size)],
+        )
+
+    def test_errors(self):
+        with self.assertRaises(ApiErrorMock):
+            self.client.over_query_limit()
+
+        self.assertEqual(
+            self.backend.counters[
+                (
+                    "api.errors",
+                    ("method", "over_query_limit"),
+                    ("status", "OVER_QUERY_LIMIT"),
+                )
+            ],
+            1,
+        )
+        self.assertEqual(len(self.backend.timings), 1)
+
+    def test_call_many(self):
+        self.client.place("a")
+
+        self.client.call_many(
+            "place", [(("a",), {}), (("b",), {}), (("c",), {})]
+        )
+
+        self.assertEqual(
+            self.backend.counters[("cache.misses", ("method", "place"))], 3
+        )
+        self.assertEqual(
+            self.backend.counters[("cache.l2_hits", ("method", "place"))], 1
+        )
+        self.assertEqual(len(self.backend.timings), 3)
+        self.assertEqual(len(self.backend.histograms), 3)
+
+    def test_call_many_errors(self):
+        self.client.call_many("not_found", [((), {})], return_exceptions=True)
+
+        self.assertEqual(
+            self.backend.counters[
+                (
+                    "api.errors",
+                    ("method", "not_found"),
+                    ("status", "NOT_FOUND"),
+                )
+            ],
+            1,
+        )
+
+    def test_async(self):
+        client = AsyncCacheableWrapper(AsyncGoogleMapClientMock())
+        client.metrics = self.backend
+
+        asyncio.run(client.async_method("a", "b"))
+        asyncio.run(client.async_method("a", "b"))
+        asyncio.run(client.acall_many("async_method", [(("c", "d"), {})]))
+
+        self.assertEqual(
+            self.backend.counters,
+            {
+                ("cache.misses", ("method", "async_method")): 2,
+                ("cache.l2_hits", ("method", "async_method")): 1,
+            },
+        )
+        self.assertEqual(len(self.backend.timings), 2)
+
+
+class StatsClientMock:
+    def __init__(self):
+        self.sent = []
+
+    def incr(self, stat, count=1):
+        self.sent.append(("incr", stat, count))
+
+    def timing(self, stat, delta):
+        self.sent.append(("timing", stat, delta))
+
+
+class StatsdBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.client = StatsClientMock()
+        self.backend = StatsdBackend(self.client)
+
+    def test_tags_are_appended_to_the_name(self):
+        self.backend.incr(
+            "api.errors", 1, {"method": "place", "status": "NOT_FOUND"}
+        )
+        self.backend.incr("cache.misses")
+
+        self.assertEqual(
+            self.client.sent,
+            [
+                ("incr", "places.api.errors.place.NOT_FOUND", 1),
+                ("incr", "places.cache.misses", 1),
+            ],
+        )
+
+    def test_timings_in_milliseconds(self):
+        self.backend.timing("api.latency", 0.25, {"method": "place"})
+        self.backend.histogram("cache.value_bytes", 512, {"method": "place"})
+
+        self.assertEqual(
+            self.client.sent,
+            [
+                ("timing", "places.api.latency.place", 250),
+                ("timing", "places.cache.value_bytes.place", 512),
+            ],
+        )
+
+
+@skipUnless(prometheus_client, "prometheus_client is not installed")
+class PrometheusBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = prometheus_client.CollectorRegistry()
+        self.backend = PrometheusBackend(self.registry)
+
+    def test_metrics(self):
+        self.backend.incr("cache.misses", 2, {"method": "place"})
+        self.backend.timing("api.latency", 0.25, {"method": "place"})
+        self.backend.histogram("cache.value_bytes", 512, {"method": "place"})
+
+        get = self.registry.get_sample_value
+        self.assertEqual(
+            get("places_cache_misses_total", {"method": "place"}), 2
+        )
+        self.assertEqual(
+            get("places_api_latency_seconds_sum", {"method": "place"}), 0.25
+        )
+        self.assertEqual(
+            get("places_cache_value_bytes_count", {"method": "place"}), 1
+        )
+
+
+class GetMetricsBackendTests(SimpleTestCase):
+    def tearDown(self):
+        load_backend.cache_clear()
+
+    def test_default(self):
+        backend = get_metrics_backend()
+
+        self.assertIs(type(backend), MetricsBackend)
+        self.assertIs(get_metrics_backend(), backend)
+
+    @override_settings(
+        GOOGLE_PLACES_METRICS_BACKEND=(
+            "places.tests.test_metrics.RecordingBackend"
+        )
+    )
+    def test_setting(self):
+        self.assertIsInstance(get_metrics_backend(), RecordingBackend)
+        self.assertIsInstance(
+            CacheableWrapper(ClientMock()).metrics, RecordingBackend
+        )
+
+    @skipUnless(prometheus_client is None, "prometheus_client is installed")
+    def test_missing_dependency(self):
+        with self.assertRaises(ImproperlyConfigured):
+            PrometheusBackend()
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from places.components import make_name_hash
+
+
+class MergeDuplicateComponentsMigrationTest(TransactionTestCase):
+    migrate_from = [("places", "0006_addressquery")]
+    migrate_to = [("places", "0008_alter_addresscomponent_name_hash")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_duplicates_are_merged(self):
+        apps = self.migrate(self.migrate_from)
+        Locality = apps.get_model("places", "Locality")
+        Place = apps.get_model("places", "Place")
+        names = {"long_name_en": "Moscow", "short_name_en": "MSK"}
+        first = Locality.objects.create(**names)
+        second = Locality.objects.create(**names)
+        other = Locality.objects.create(long_name_en="Madrid")
+        place = Place.objects.create(
+            place_id="place",
+            country="RU",
+            latitude=0,
+            longitude=0,
+            locality=second,
+        )
+
+        apps = self.migrate(self.migrate_to)
+        Locality = apps.get_model("places", "Locality")
+        Place = apps.get_model("places", "Place")
+
+        self.assertEqual(
+            set(Locality.objects.values_list("pk", flat=True)),
+            {first.pk, other.pk},
+        )
+        self.assertEqual(
+            Locality.objects.get(pk=first.pk).name_hash,
+            make_name_hash(names),
+        )
+        self.assertEqual(Place.objects.get(pk=place.pk).locality_id, first.pk)
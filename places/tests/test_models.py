@@ -1,15 +1,94 @@
+import datetime
+import threading
 from unittest.mock import call, patch
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.test import TestCase
-
-from places.models import AdministrativeAreaLevel1, Place, PlaceManager
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from places.models import (
+    DETAILS_FIELDS,
+    AddressQuery,
+    AdministrativeAreaLevel1,
+    Locality,
+    Place,
+    PlaceManager,
+    Route,
+)
+from places.wrappers import AsyncCacheableWrapper, CacheableWrapper
+
+
+def create_place(place_id):
+    return Place.objects.create(
+        place_id=place_id,
+        formatted_address="address",
+        country="US",
+        latitude=0,
+        longitude=0,
+    )
+
+
+def delegate_call_many(gmaps_mock):
+    """
+    Make the mocked call_many call the mocked client methods one by one.
+    """
+
+    def call_many(name, calls, executor=None, return_exceptions=False):
+        results = []
+        for args, kwargs in calls:
+            try:
+                results.append(getattr(gmaps_mock, name)(*args, **kwargs))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    gmaps_mock.call_many.side_effect = call_many
+
+
+def find_place_response(address):
+    if address.startswith("bad"):
+        return {"status": "ZERO_RESULTS", "candidates": []}
+    return {"status": "OK", "candidates": [{"place_id": f"id:{address}"}]}
+
+
+def place_response(place_id, language, fields=None):
+    return {
+        "status": "OK",
+        "result": {
+            "formatted_address": f"{place_id} ({language})",
+            "address_components": [
+                {
+                    "long_name": f"Route {language}",
+                    "short_name": f"Rt {language}",
+                    "types": ["route"],
+                },
+                {
+                    "long_name": f"Locality {language}",
+                    "short_name": f"Loc {language}",
+                    "types": ["locality", "political"],
+                },
+                {
+                    "long_name": "United States",
+                    "short_name": "US",
+                    "types": ["country", "political"],
+                },
+            ],
+            "geometry": {"location": {"lat": 40.7, "lng": -74.0}},
+        },
+    }
 
 
 class PlaceManagerGetDetailsMethodTest(TestCase):
     def setUp(self):
         self.gmaps_patcher = patch("places.models.cacheable_gmaps")
         self.gmaps_mock = self.gmaps_patcher.start()
+        delegate_call_many(self.gmaps_mock)
 
     def tearDown(self):
         self.gmaps_patcher.stop()
@@ -38,7 +117,9 @@ class PlaceManagerGetDetailsMethodTest(TestCase):
             "candidates": [{"place_id": place_id}],
         }
 
-        with patch.object(Place.objects, "get") as get_mock:
+        with patch.object(Place.objects, "get") as get_mock, patch.object(
+            AddressQuery.objects, "remember"
+        ):
             Place.objects.get_details("sdqdqwdq")
 
         get_mock.assert_called_once_with(place_id=place_id)
@@ -63,7 +144,7 @@ class PlaceManagerGetDetailsMethodTest(TestCase):
         Place.objects.get_details("sdqdqwdq")
 
         calls = [
-            call(place_id, language=lang)
+            call(place_id, fields=sorted(DETAILS_FIELDS), language=lang)
             for lang in settings.MODELTRANSLATION_LANGUAGES
         ]
         self.assertEqual(
@@ -72,6 +153,467 @@ class PlaceManagerGetDetailsMethodTest(TestCase):
         )
         self.gmaps_mock.place.assert_has_calls(calls, any_order=True)
 
+    @override_settings(GOOGLE_PLACES_QUERY_TOUCH_INTERVAL=0)
+    def test_known_address_skips_find_place(self):
+        place = create_place("place id")
+        AddressQuery.objects.remember("Some  Street 1", place)
+
+        result = Place.objects.get_details("some street 1 ")
+
+        self.assertEqual(result, place)
+        self.gmaps_mock.find_place.assert_not_called()
+        self.assertEqual(AddressQuery.objects.get().hits, 1)
+
+    def test_remember_resolved_address(self):
+        place = create_place("place id")
+        self.gmaps_mock.find_place.return_value = {
+            "status": "OK",
+            "candidates": [{"place_id": place.place_id}],
+        }
+
+        Place.objects.get_details("Some Street 1")
+
+        query = AddressQuery.objects.get()
+        self.assertEqual(query.place, place)
+        self.assertEqual(query.query, "some street 1")
+
+
+class PlaceManagerGetDetailsManyMethodTest(TestCase):
+    def setUp(self):
+        self.gmaps_patcher = patch("places.models.cacheable_gmaps")
+        self.gmaps_mock = self.gmaps_patcher.start()
+        delegate_call_many(self.gmaps_mock)
+        self.gmaps_mock.find_place.side_effect = (
+            lambda input, input_type: find_place_response(input)
+        )
+        self.gmaps_mock.place.side_effect = place_response
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+
+    def count_queries(self, addresses):
+        with CaptureQueriesContext(connection) as context:
+            Place.objects.get_details_many(addresses)
+        return len(context.captured_queries)
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        small = self.count_queries(["1 street", "2 street"])
+        Place.objects.all().delete()
+        AddressQuery.objects.all().delete()
+        Route.objects.all().delete()
+        Locality.objects.all().delete()
+
+        large = self.count_queries([f"{n} street" for n in range(3, 23)])
+
+        self.assertEqual(small, large)
+        self.assertEqual(Place.objects.count(), 20)
+        self.assertEqual(Route.objects.count(), 1)
+        self.assertEqual(Locality.objects.count(), 1)
+
+    def test_results_in_input_order(self):
+        addresses = ["b street", "a street", "bad street"]
+
+        results = Place.objects.get_details_many(addresses)
+
+        self.assertEqual([r.address for r in results], addresses)
+        self.assertEqual(results[0].place.place_id, "id:b street")
+        self.assertEqual(results[1].place.place_id, "id:a street")
+        self.assertIsNone(results[2].place)
+        self.assertIsNone(results[2].error)
+        self.assertEqual(Place.objects.count(), 2)
+        self.assertEqual(
+            results[0].place.formatted_address_ru, "id:b street (ru)"
+        )
+        self.assertEqual(results[0].place.locality.long_name_es, "Locality es")
+
+    def test_deduplicate_addresses(self):
+        results = Place.objects.get_details_many(
+            ["a street", "A  Street", "a street"]
+        )
+
+        self.gmaps_mock.find_place.assert_called_once()
+        self.assertEqual(
+            self.gmaps_mock.place.call_count,
+            len(settings.MODELTRANSLATION_LANGUAGES),
+        )
+        self.assertEqual(len({r.place.pk for r in results}), 1)
+
+    def test_known_places_are_not_fetched(self):
+        place = create_place("id:a street")
+
+        results = Place.objects.get_details_many(["a street"])
+
+        self.assertEqual(results[0].place, place)
+        self.gmaps_mock.place.assert_not_called()
+
+    def test_report_per_address_failures(self):
+        error = ValueError("boom")
+
+        def find_place(input, input_type):
+            if input == "broken":
+                raise error
+            return find_place_response(input)
+
+        self.gmaps_mock.find_place.side_effect = find_place
+
+        results = Place.objects.get_details_many(["broken", "a street"])
+
+        self.assertIsNone(results[0].place)
+        self.assertIs(results[0].error, error)
+        self.assertIsNotNone(results[1].place)
+        self.assertIsNone(results[1].error)
+
+    def test_remember_resolved_addresses(self):
+        Place.objects.get_details_many(["a street"])
+        self.gmaps_mock.find_place.reset_mock()
+
+        Place.objects.get_details_many(["a street"])
+
+        self.gmaps_mock.find_place.assert_not_called()
+
+
+class PlaceClientMock:
+    def __init__(self, barrier=None):
+        self.barrier = barrier
+        self.languages = []
+
+    def find_place(self, input, input_type, **kwargs):
+        return find_place_response(input)
+
+    def place(self, place_id, language, fields=None):
+        self.languages.append(language)
+        if self.barrier is not None:
+            self.barrier.wait()
+        return place_response(place_id, language)
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class PlaceManagerFetchDetailsMethodTest(TestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+
+    def fetch_details(self, client, place_id="place_id"):
+        with patch("places.models.cacheable_gmaps", CacheableWrapper(client)):
+            return Place.objects.fetch_details(place_id)
+
+    def test_sequential_by_default(self):
+        client = PlaceClientMock()
+
+        details = self.fetch_details(client)
+
+        self.assertEqual(
+            client.languages, list(settings.MODELTRANSLATION_LANGUAGES)
+        )
+        self.assertEqual(details["ru"]["formatted_address"], "place_id (ru)")
+
+    @override_settings(GOOGLE_PLACES_LANGUAGE_WORKERS=3)
+    def test_concurrent_languages(self):
+        languages = settings.MODELTRANSLATION_LANGUAGES
+        # Every call blocks until all of them are in flight at once.
+        client = PlaceClientMock(threading.Barrier(len(languages), timeout=5))
+
+        details = self.fetch_details(client)
+
+        self.assertCountEqual(client.languages, languages)
+        self.assertEqual(list(details), list(languages))
+        for lang in languages:
+            self.assertEqual(
+                details[lang]["formatted_address"], f"place_id ({lang})"
+            )
+
+    @override_settings(GOOGLE_PLACES_LANGUAGE_WORKERS=3)
+    def test_cached_languages_are_not_fetched(self):
+        client = PlaceClientMock()
+        wrapper = CacheableWrapper(client)
+        wrapper.place(
+            "place_id", language="en", fields=PlaceManager.get_details_fields()
+        )
+        client.languages.clear()
+
+        details = self.fetch_details(client)
+
+        self.assertCountEqual(client.languages, ["ru", "es"])
+        self.assertEqual(details["en"]["formatted_address"], "place_id (en)")
+
+    def test_fetch_details_many_reads_cache_once(self):
+        client = PlaceClientMock()
+        cache = caches["locmem"]
+
+        with patch(
+            "places.models.cacheable_gmaps", CacheableWrapper(client)
+        ), patch.object(cache, "get_many", wraps=cache.get_many) as get_mock:
+            details = Place.objects.fetch_details_many(["first", "second"])
+
+        get_mock.assert_called_once()
+        self.assertEqual(
+            details["second"]["es"]["formatted_address"], "second (es)"
+        )
+        self.assertEqual(
+            len(client.languages),
+            2 * len(settings.MODELTRANSLATION_LANGUAGES),
+        )
+
+    @override_settings(
+        GOOGLE_PLACES_DETAILS_FIELDS=["geometry", "address_component"]
+    )
+    def test_details_fields_setting(self):
+        self.assertEqual(
+            PlaceManager.get_details_calls("place_id")[0],
+            (
+                ("place_id",),
+                {
+                    "fields": ["address_component", "geometry"],
+                    "language": "en",
+                },
+            ),
+        )
+
+    @override_settings(GOOGLE_PLACES_DETAILS_FIELDS=None)
+    def test_details_fields_disabled(self):
+        self.assertEqual(
+            PlaceManager.get_details_calls("place_id")[0],
+            (("place_id",), {"language": "en"}),
+        )
+
+    def test_details_fields_are_part_of_the_cache_key(self):
+        client = PlaceClientMock()
+        wrapper = CacheableWrapper(client)
+        wrapper.place("place_id", language="en")
+        client.languages.clear()
+
+        self.fetch_details(client)
+
+        self.assertEqual(
+            client.languages, list(settings.MODELTRANSLATION_LANGUAGES)
+        )
+
+
+@override_settings(
+    GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem",
+    GOOGLE_PLACES_CLAIM_POLL_INTERVAL=0.01,
+)
+class PlaceManagerClaimTest(TestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.client = PlaceClientMock()
+        self.gmaps_patcher = patch(
+            "places.models.cacheable_gmaps", CacheableWrapper(self.client)
+        )
+        self.gmaps_patcher.start()
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+
+    def claim(self, place_id):
+        caches["locmem"].add(Place.objects.make_claim_key(place_id), 1)
+
+    def test_claim_is_released(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            place = Place.objects.create_from_place_id("place_id")
+
+        self.assertEqual(place.place_id, "place_id")
+        self.assertIsNone(
+            caches["locmem"].get(Place.objects.make_claim_key("place_id"))
+        )
+
+    def test_claim_is_held_until_commit(self):
+        key = Place.objects.make_claim_key("id:a street")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Place.objects.get_details("a street")
+                self.assertIsNotNone(caches["locmem"].get(key))
+
+        self.assertIsNone(caches["locmem"].get(key))
+
+    def test_claim_is_released_on_failure(self):
+        with patch.object(
+            Place.objects, "create_from_details", side_effect=ValueError
+        ), self.assertRaises(ValueError):
+            Place.objects.create_from_place_id("place_id")
+
+        self.assertIsNone(
+            caches["locmem"].get(Place.objects.make_claim_key("place_id"))
+        )
+
+    def test_wait_for_claimed_place(self):
+        self.claim("place_id")
+        stored = create_place("place_id")
+
+        place = Place.objects.create_from_place_id("place_id")
+
+        self.assertEqual(place, stored)
+        self.assertEqual(self.client.languages, [])
+
+    def test_fetch_when_claim_is_released_without_place(self):
+        self.claim("place_id")
+        caches["locmem"].delete(Place.objects.make_claim_key("place_id"))
+
+        place = Place.objects.create_from_place_id("place_id")
+
+        self.assertEqual(place.formatted_address_en, "place_id (en)")
+
+    @override_settings(GOOGLE_PLACES_CLAIM_TIMEOUT=0.05)
+    def test_fetch_when_claim_times_out(self):
+        self.claim("place_id")
+
+        place = Place.objects.create_from_place_id("place_id")
+
+        self.assertEqual(place.place_id, "place_id")
+
+    def test_create_existing_place(self):
+        details = Place.objects.fetch_details("place_id")
+        first = Place.objects.create_from_details("place_id", details)
+
+        second = Place.objects.create_from_details("place_id", details)
+
+        self.assertEqual(second, first)
+        self.assertEqual(Place.objects.count(), 1)
+
+
+class AsyncPlaceClientMock:
+    def __init__(self):
+        self.calls = []
+
+    async def find_place(self, input, input_type):
+        self.calls.append(("find_place", input))
+        return find_place_response(input)
+
+    async def place(self, place_id, language, fields=None):
+        self.calls.append(("place", language))
+        return place_response(place_id, language)
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class PlaceManagerAGetDetailsMethodTest(TestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.client = AsyncPlaceClientMock()
+        self.gmaps_patcher = patch(
+            "places.models.async_cacheable_gmaps",
+            AsyncCacheableWrapper(self.client),
+        )
+        self.gmaps_patcher.start()
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+
+    async def test_create_place(self):
+        place = await Place.objects.aget_details("a street")
+
+        self.assertEqual(place.place_id, "id:a street")
+        self.assertEqual(place.formatted_address_es, "id:a street (es)")
+        self.assertCountEqual(
+            self.client.calls,
+            [("find_place", "a street")]
+            + [
+                ("place", lang) for lang in settings.MODELTRANSLATION_LANGUAGES
+            ],
+        )
+
+    async def test_status_not_eq_OK(self):
+        self.assertIsNone(await Place.objects.aget_details("bad street"))
+
+    @override_settings(GOOGLE_PLACES_CLAIM_POLL_INTERVAL=0.01)
+    async def test_wait_for_claimed_place(self):
+        key = Place.objects.make_claim_key("id:a street")
+        await caches["locmem"].aadd(key, 1)
+        stored = await sync_to_async(create_place)("id:a street")
+
+        place = await Place.objects.acreate_from_place_id("id:a street")
+
+        self.assertEqual(place, stored)
+        self.assertEqual(self.client.calls, [])
+
+    async def test_known_address_skips_find_place(self):
+        first = await Place.objects.aget_details("a street")
+        self.client.calls.clear()
+
+        second = await Place.objects.aget_details("A Street")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.calls, [])
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class PlaceManagerUnresolvedAddressTest(TestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.gmaps_patcher = patch("places.models.cacheable_gmaps")
+        self.gmaps_mock = self.gmaps_patcher.start()
+        delegate_call_many(self.gmaps_mock)
+        self.gmaps_mock.find_place.side_effect = (
+            lambda input, input_type: find_place_response(input)
+        )
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+
+    def test_skip_known_bad_address(self):
+        Place.objects.get_details("bad street")
+        self.gmaps_mock.find_place.reset_mock()
+
+        self.assertIsNone(Place.objects.get_details("Bad Street"))
+
+        self.gmaps_mock.find_place.assert_not_called()
+
+    def test_place_without_country(self):
+        def place(place_id, language, fields=None):
+            response = place_response(place_id, language)
+            response["result"]["address_components"].pop()
+            return response
+
+        self.gmaps_mock.place.side_effect = place
+
+        self.assertIsNone(Place.objects.get_details("a street"))
+        self.assertTrue(AddressQuery.objects.is_unresolved("a street"))
+
+    def test_get_details_many_skips_known_bad_address(self):
+        Place.objects.get_details_many(["bad street"])
+        self.gmaps_mock.find_place.reset_mock()
+
+        results = Place.objects.get_details_many(["bad street"])
+
+        self.assertIsNone(results[0].place)
+        self.gmaps_mock.find_place.assert_not_called()
+
+
+class AddressQueryManagerTest(TestCase):
+    def test_normalize(self):
+        self.assertEqual(
+            AddressQuery.objects.normalize("  Some\tStreet   1 "),
+            "some street 1",
+        )
+
+    def test_lookup_unknown_address(self):
+        self.assertIsNone(AddressQuery.objects.lookup("Some Street 1"))
+
+    def test_lookup_touches_query_once_per_interval(self):
+        place = create_place("place id")
+        AddressQuery.objects.remember("Some Street 1", place)
+
+        with self.assertNumQueries(1):
+            AddressQuery.objects.lookup("Some Street 1")
+
+        AddressQuery.objects.update(
+            last_seen=timezone.now() - datetime.timedelta(minutes=10)
+        )
+        with self.assertNumQueries(2):
+            AddressQuery.objects.lookup("Some Street 1")
+        with self.assertNumQueries(1):
+            AddressQuery.objects.lookup("Some Street 1")
+        self.assertEqual(AddressQuery.objects.get().hits, 1)
+
+    def test_remember_updates_existing_query(self):
+        first = create_place("first")
+        second = create_place("second")
+        AddressQuery.objects.remember("Some Street 1", first)
+
+        AddressQuery.objects.remember("some street 1", second)
+
+        self.assertEqual(AddressQuery.objects.count(), 1)
+        self.assertEqual(AddressQuery.objects.lookup("Some Street 1"), second)
+
 
 class PlaceManagerGetComponentObjectMethodTest(TestCase):
     def setUp(self):
@@ -0,0 +1,125 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from places import profiling
+from places.models import Place
+from places.tests.test_budgets import FullPlaceClient
+from places.tests.test_metrics import RecordingBackend
+from places.wrappers import CacheableWrapper
+
+profiles = []
+
+
+def collect(profile):
+    profiles.append(profile)
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class GetDetailsProfilingTest(TestCase):
+    def setUp(self):
+        self.profiles = []
+        caches["locmem"].clear()
+        self.gmaps_patcher = patch(
+            "places.models.cacheable_gmaps",
+            CacheableWrapper(FullPlaceClient()),
+        )
+        self.gmaps_patcher.start()
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+        profiles.clear()
+
+    def get_details(self, address):
+        with profiling.profile(self.profiles.append):
+            return Place.objects.get_details(address)
+
+    def test_new_place(self):
+        self.get_details("Gran Via 1")
+
+        [profile] = self.profiles
+        self.assertEqual(profile.name, "get_details")
+        self.assertEqual(profile.address, "Gran Via 1")
+        self.assertEqual(
+            list(profile.stages),
+            [
+                "lookup",
+                "find_place",
+                "get_place",
+                "fetch_details",
+                "parse",
+                "components",
+                "insert",
+                "remember",
+            ],
+        )
+        self.assertEqual(profile.stages["find_place"].queries, 0)
+        self.assertEqual(profile.stages["insert"].queries, 1)
+        self.assertGreater(profile.stages["components"].queries, 0)
+        self.assertGreaterEqual(
+            profile.queries,
+            sum(stage.queries for stage in profile.stages.values()),
+        )
+        self.assertGreaterEqual(
+            profile.seconds,
+            sum(stage.seconds for stage in profile.stages.values()),
+        )
+
+    def test_known_address(self):
+        Place.objects.get_details("Gran Via 1")
+
+        self.get_details("Gran Via 1")
+
+        [profile] = self.profiles
+        self.assertEqual(list(profile.stages), ["lookup"])
+        self.assertEqual(profile.stages["lookup"].queries, 1)
+        self.assertEqual(profile.queries, 1)
+
+    def test_profile_delivered_on_error(self):
+        with patch.object(
+            Place.objects, "find_place_id", side_effect=ValueError
+        ), self.assertRaises(ValueError):
+            self.get_details("Gran Via 1")
+
+        [profile] = self.profiles
+        self.assertEqual(list(profile.stages), ["lookup", "find_place"])
+
+    def test_disabled(self):
+        Place.objects.get_details("Gran Via 1")
+
+        self.assertIs(profiling.stage("lookup"), profiling.NOT_PROFILED)
+        self.assertEqual(self.profiles, [])
+
+    @override_settings(
+        GOOGLE_PLACES_PROFILE_CALLBACK="places.tests.test_profiling.collect"
+    )
+    def test_callback_setting(self):
+        Place.objects.get_details("Gran Via 1")
+
+        self.assertEqual(len(profiles), 1)
+
+    def test_log_profile(self):
+        with self.assertLogs("places.profiling", "INFO") as logs:
+            with profiling.profile(profiling.log_profile):
+                Place.objects.get_details("Gran Via 1")
+
+        [record] = logs.records
+        self.assertIn("get_details('Gran Via 1')", record.getMessage())
+        self.assertIn("components", record.profile["stages"])
+
+    def test_report_profile(self):
+        backend = RecordingBackend()
+
+        with patch("places.profiling.get_metrics_backend", lambda: backend):
+            with profiling.profile(profiling.report_profile):
+                Place.objects.get_details("Gran Via 1")
+
+        self.assertEqual(backend.timings[0][0], ("get_details",))
+        self.assertIn(
+            ("get_details.stage", ("stage", "insert")),
+            [key for key, _ in backend.timings],
+        )
+        self.assertEqual(
+            backend.counters[("get_details.queries", ("stage", "insert"))], 1
+        )
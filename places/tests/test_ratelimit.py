@@ -0,0 +1,34 @@
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from places.ratelimit import RateLimiter
+
+
+class RateLimiterTests(TestCase):
+    def test_burst_is_not_throttled(self):
+        limiter = RateLimiter(1, burst=3)
+
+        with patch("places.ratelimit.time.sleep") as sleep_mock:
+            for _ in range(3):
+                limiter.acquire()
+
+        sleep_mock.assert_not_called()
+
+    def test_rate(self):
+        limiter = RateLimiter(200)
+        started = time.monotonic()
+
+        for _ in range(21):
+            limiter.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_acquire_more_than_the_burst(self):
+        limiter = RateLimiter(100, burst=1)
+        started = time.monotonic()
+
+        limiter.acquire(5)
+        limiter.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
@@ -0,0 +1,176 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+from googlemaps.exceptions import ApiError
+
+from places.models import Place
+from places.tests.test_models import place_response
+
+
+class FreshClientMock:
+    def __init__(self, suffix="", moved=None):
+        self.suffix = suffix
+        self.moved = moved or {}
+        self.calls = []
+
+    def place(self, place_id, language, fields=None):
+        self.calls.append((place_id, language, fields))
+        if place_id.startswith("gone"):
+            raise ApiError("NOT_FOUND")
+        response = place_response(f"{place_id}{self.suffix}", language)
+        response["result"]["place_id"] = self.moved.get(place_id, place_id)
+        return response
+
+
+class RefreshTestCase(TestCase):
+    def setUp(self):
+        self.client = FreshClientMock()
+        self.gmaps_patcher = patch("places.models.gmaps", self.client)
+        self.gmaps_patcher.start()
+
+    def tearDown(self):
+        self.gmaps_patcher.stop()
+
+    def create(self, place_id, fetched_at=None):
+        details = Place.objects.fetch_fresh_details(place_id)
+        place = Place.objects.create_from_details(place_id, details)
+        Place.objects.filter(pk=place.pk).update(fetched_at=fetched_at)
+        place.refresh_from_db()
+        self.client.calls.clear()
+        return place
+
+
+class PlaceManagerRefreshManyTest(RefreshTestCase):
+    def test_fields_include_place_id(self):
+        place = self.create("place")
+
+        Place.objects.refresh_many([place])
+
+        for _, _, fields in self.client.calls:
+            self.assertIn("place_id", fields)
+
+    def test_unchanged(self):
+        place = self.create("place")
+
+        stats = Place.objects.refresh_many([place])
+
+        self.assertEqual(stats["unchanged"], 1)
+        place.refresh_from_db()
+        self.assertIsNotNone(place.fetched_at)
+
+    def test_save_changed_fields(self):
+        place = self.create("place")
+        self.client.suffix = " new"
+
+        with self.assertNumQueries(5):
+            stats = Place.objects.refresh_many([place])
+
+        self.assertEqual(stats["updated"], 1)
+        place.refresh_from_db()
+        self.assertEqual(place.formatted_address_ru, "place new (ru)")
+
+    def test_failed_places_stay_stale(self):
+        place = Place.objects.create(
+            place_id="gone", country="US", latitude=0, longitude=0
+        )
+
+        stats = Place.objects.refresh_many([place])
+
+        self.assertEqual(stats["failed"], 1)
+        place.refresh_from_db()
+        self.assertIsNone(place.fetched_at)
+
+    def test_changed_place_id(self):
+        place = self.create("old")
+        self.client.moved = {"old": "new"}
+
+        Place.objects.refresh_many([place])
+
+        place.refresh_from_db()
+        self.assertEqual(place.place_id, "new")
+
+    def test_keep_place_id_taken_by_another_place(self):
+        place = self.create("old")
+        self.create("new")
+        self.client.moved = {"old": "new"}
+
+        with self.assertLogs("places.models", "WARNING") as logs:
+            stats = Place.objects.refresh_many([place])
+
+        self.assertEqual(stats["conflicts"], 1)
+        place.refresh_from_db()
+        self.assertEqual(place.place_id, "old")
+        [message] = logs.output
+        self.assertIn(
+            f"Place {place.pk} keeps place_id 'old', its new place_id 'new' "
+            "is taken.",
+            message,
+        )
+
+    def test_new_place_id_claimed_once_per_chunk(self):
+        first = self.create("first")
+        second = self.create("second")
+        self.client.moved = {"first": "new", "second": "new"}
+
+        with self.assertLogs("places.models", "WARNING") as logs:
+            stats = Place.objects.refresh_many([first, second])
+
+        self.assertEqual(stats["conflicts"], 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.place_id, "new")
+        self.assertEqual(second.place_id, "second")
+        [message] = logs.output
+        self.assertIn(f"Place {second.pk} keeps place_id 'second'", message)
+
+
+class RefreshPlacesCommandTest(RefreshTestCase):
+    def refresh(self, *args):
+        out = StringIO()
+        call_command("refresh_places", "--qps=1000", *args, stdout=out)
+        return out.getvalue()
+
+    def test_refresh_stale_places(self):
+        old = timezone.now() - timedelta(days=60)
+        stale = [self.create(f"stale {n}", fetched_at=old) for n in range(3)]
+        never = self.create("never")
+        fresh = self.create("fresh", fetched_at=timezone.now())
+        self.client.suffix = " new"
+
+        out = self.refresh("--chunk-size=2")
+
+        refreshed = {place_id for place_id, _, _ in self.client.calls}
+        self.assertEqual(
+            refreshed, {p.place_id for p in stale} | {never.place_id}
+        )
+        self.assertNotIn(fresh.place_id, refreshed)
+        self.assertIn("places=4 updated=4", out)
+        self.assertEqual(out.count("after="), 2)
+
+    def test_reject_non_positive_qps(self):
+        with self.assertRaisesMessage(CommandError, "--qps"):
+            call_command("refresh_places", "--qps=0", stdout=StringIO())
+
+    def test_resume_after(self):
+        first = self.create("first")
+        second = self.create("second")
+
+        self.refresh(f"--after={first.pk}")
+
+        self.assertEqual(
+            {place_id for place_id, _, _ in self.client.calls},
+            {second.place_id},
+        )
+
+    def test_limit(self):
+        for n in range(3):
+            self.create(f"place {n}")
+
+        out = self.refresh("--limit=2", "--chunk-size=5")
+
+        self.assertIn("places=2 ", out)
+        self.assertEqual(Place.objects.filter(fetched_at=None).count(), 1)
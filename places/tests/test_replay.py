@@ -0,0 +1,113 @@
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from googlemaps.exceptions import ApiError
+
+from places.models import Place
+from places.replay import ReplayClient, install
+from places.tests.test_models import find_place_response, place_response
+from places.wrappers import CacheableWrapper
+
+
+def respond(name, arguments):
+    if name == "find_place":
+        return find_place_response(arguments["input"])
+    return place_response(arguments["place_id"], arguments["language"])
+
+
+class ReplayClientTests(SimpleTestCase):
+    def test_replay(self):
+        recorder = ReplayClient(fallback=respond)
+        recorder.place("place_id", language="en")
+
+        client = ReplayClient(recorder.entries)
+
+        self.assertEqual(
+            client.place(place_id="place_id", language="en"),
+            place_response("place_id", "en"),
+        )
+
+    def test_missing_response(self):
+        with self.assertRaises(LookupError):
+            ReplayClient().place("place_id")
+
+    def test_responses_are_copies(self):
+        client = ReplayClient(fallback=respond)
+        client.place("place_id", language="en")["result"].clear()
+
+        response = client.place("place_id", language="en")
+
+        self.assertIn("formatted_address", response["result"])
+
+    def test_count_calls(self):
+        client = ReplayClient(fallback=respond)
+
+        client.find_place("a street", "textquery")
+        client.place("place_id", language="en")
+        client.place("place_id", language="en")
+
+        self.assertEqual(client.calls, {"find_place": 1, "place": 2})
+        self.assertEqual(client.misses, {"find_place": 1, "place": 1})
+
+    def test_latency_and_jitter(self):
+        client = ReplayClient(
+            fallback=respond, latency=0.1, jitter=0.05, seed=1
+        )
+
+        with patch("places.replay.time.sleep") as sleep_mock:
+            for _ in range(20):
+                client.place("place_id", language="en")
+
+        delays = [args[0] for args, _ in sleep_mock.call_args_list]
+        self.assertEqual(len(delays), 20)
+        self.assertTrue(all(0.05 <= delay <= 0.15 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_record_and_load(self):
+        real = MagicMock()
+        real.place.return_value = place_response("place_id", "en")
+        real.find_place.side_effect = ApiError("ZERO_RESULTS", "nothing")
+        recorder = ReplayClient(client=real)
+        recorder.place("place_id", language="en")
+        with self.assertRaises(ApiError):
+            recorder.find_place("a street", "textquery")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "responses.json")
+            recorder.save(path)
+            client = ReplayClient.load(path)
+
+        self.assertEqual(
+            client.place("place_id", language="en"),
+            place_response("place_id", "en"),
+        )
+        with self.assertRaises(ApiError) as cm:
+            client.find_place(input="a street", input_type="textquery")
+        self.assertEqual(cm.exception.status, "ZERO_RESULTS")
+        self.assertEqual(real.place.call_count, 1)
+
+    @override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+    def test_behind_cacheable_wrapper(self):
+        caches["locmem"].clear()
+        client = ReplayClient(fallback=respond)
+        wrapper = CacheableWrapper(client)
+
+        wrapper.place("place_id", language="en")
+        wrapper.place(place_id="place_id", language="en")
+
+        self.assertEqual(client.calls["place"], 1)
+
+
+class ReplayPipelineTests(TestCase):
+    def test_get_details(self):
+        client = ReplayClient(fallback=respond)
+
+        with install(client):
+            place = Place.objects.get_details("a street")
+
+        self.assertEqual(place.place_id, "id:a street")
+        self.assertEqual(client.calls["find_place"], 1)
+        self.assertEqual(client.calls["place"], 3)
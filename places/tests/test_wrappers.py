@@ -1,11 +1,41 @@
+import asyncio
 import pickle
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 from unittest.mock import patch
 
 from django.conf import settings
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
 
-from places.wrappers import CacheableWrapper
+from places.wrappers import (
+    FRESH_UNTIL,
+    STALE_HEADER,
+    AsyncCacheableWrapper,
+    CacheableWrapper,
+)
+
+
+def make_stale(key, serialized=None):
+    """
+    Turn the cached value of key, or the given serialized result, into an
+    expired entry kept by GOOGLE_PLACES_STALE_TIME.
+    """
+    if serialized is None:
+        serialized, _ = CacheableWrapper._unpack(caches["locmem"].get(key))
+    caches["locmem"].set(key, STALE_HEADER + FRESH_UNTIL.pack(0) + serialized)
+
+
+def get_cached(client, name, *args, **kwargs):
+    """
+    Return the result of a method call stored in the cache.
+    """
+    value = caches["locmem"].get(client.make_key(name, args, kwargs))
+    serialized, _ = CacheableWrapper._unpack(value)
+    return client.serializer.loads(serialized)
 
 
 class GoogleMapClientMock:
@@ -20,6 +50,9 @@ class GoogleMapClientMock:
     def inst_method_with_args(self, a1, a2):
         return "result"
 
+    def inst_method_with_defaults(self, a1, radius=10, language=None):
+        return "result"
+
 
 class CacheableWrapperTests(TestCase):
     def setUp(self):
@@ -63,8 +96,10 @@ class CacheableWrapperTests(TestCase):
             self.client.non_existent_attr
 
     def test_cache_set__method_call(self):
-        key = "inst_method_with_args::('text',)::{'a2': '142'}"
-        data = pickle.dumps("result")
+        key = self.client.make_key(
+            "inst_method_with_args", ("text",), {"a2": "142"}
+        )
+        data = self.client.serializer.dumps("result")
 
         with patch.object(cache, "set") as cache_mock:
             self.client.inst_method_with_args("text", a2="142")
@@ -78,7 +113,9 @@ class CacheableWrapperTests(TestCase):
         cache_mock.assert_not_called()
 
     def test_cache_get__before_data_were_cached__method_call(self):
-        key = "inst_method_with_args::('text',)::{'a2': '142'}"
+        key = self.client.make_key(
+            "inst_method_with_args", ("text",), {"a2": "142"}
+        )
 
         with patch.object(cache, "get", return_value=None) as cache_mock:
             self.client.inst_method_with_args("text", a2="142")
@@ -86,10 +123,689 @@ class CacheableWrapperTests(TestCase):
         cache_mock.assert_called_once_with(key)
 
     def test_cache_get__after_data_were_cached__method_call(self):
-        key = "inst_method_with_args::('text',)::{'a2': '142'}"
+        key = self.client.make_key(
+            "inst_method_with_args", ("text",), {"a2": "142"}
+        )
         data = pickle.dumps("result")
 
         with patch.object(cache, "get", return_value=data) as cache_mock:
             self.client.inst_method_with_args("text", a2="142")
 
         cache_mock.assert_called_once_with(key)
+
+    def test_key_does_not_depend_on_call_shape(self):
+        key = self.client.make_key(
+            "inst_method_with_args", ("text",), {"a2": "142"}
+        )
+
+        self.assertEqual(
+            self.client.make_key(
+                "inst_method_with_args", (), {"a2": "142", "a1": "text"}
+            ),
+            key,
+        )
+        self.assertEqual(
+            self.client.make_key("inst_method_with_args", ("text", "142"), {}),
+            key,
+        )
+
+    def test_key_ignores_defaults_and_none(self):
+        key = self.client.make_key("inst_method_with_defaults", ("text",), {})
+
+        self.assertEqual(
+            self.client.make_key(
+                "inst_method_with_defaults", ("text",), {"language": None}
+            ),
+            key,
+        )
+        self.assertEqual(
+            self.client.make_key(
+                "inst_method_with_defaults", ("text",), {"radius": 10}
+            ),
+            key,
+        )
+        self.assertNotEqual(
+            self.client.make_key(
+                "inst_method_with_defaults", ("text",), {"radius": 20}
+            ),
+            key,
+        )
+
+    def test_key_normalizes_values(self):
+        self.assertEqual(
+            self.client.make_key(
+                "inst_method_with_args", ((1, 2), {"b": 1, "a": 2}), {}
+            ),
+            self.client.make_key(
+                "inst_method_with_args", ([1, 2], {"a": 2, "b": 1}), {}
+            ),
+        )
+
+    def test_key_has_fixed_length(self):
+        short = self.client.make_key("inst_method_with_args", ("a", "b"), {})
+        long = self.client.make_key(
+            "inst_method_with_args", ("a" * 1000, "b"), {}
+        )
+
+        self.assertEqual(len(short), len(long))
+        self.assertTrue(short.startswith("places:1:inst_method_with_args:"))
+
+    @override_settings(GOOGLE_PLACES_CACHE_KEY_PREFIX="custom")
+    def test_key_prefix(self):
+        client = CacheableWrapper(self.inner_client)
+
+        key = client.make_key("inst_method_with_args", ("a", "b"), {})
+
+        self.assertTrue(key.startswith("custom:1:"))
+
+
+@override_settings(
+    GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem",
+    GOOGLE_PLACES_CACHE_KEY_COMPAT=True,
+)
+class CacheableWrapperKeyCompatTests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.client = CacheableWrapper(GoogleMapClientMock())
+        legacy_key = "inst_method_with_args::('text',)::{'a2': '142'}"
+        caches["locmem"].set(legacy_key, pickle.dumps("legacy"))
+
+    def test_read_legacy_key(self):
+        result = self.client.inst_method_with_args("text", a2="142")
+
+        self.assertEqual(result, "legacy")
+        self.assertEqual(self.client.stats["legacy_hits"], 1)
+
+    def test_copy_legacy_entry_to_new_key(self):
+        self.client.inst_method_with_args("text", a2="142")
+
+        key = self.client.make_key(
+            "inst_method_with_args", ("text",), {"a2": "142"}
+        )
+        self.assertEqual(pickle.loads(caches["locmem"].get(key)), "legacy")
+
+    def test_async_read_legacy_key(self):
+        client = AsyncCacheableWrapper(GoogleMapClientMock())
+
+        result = asyncio.run(client.inst_method_with_args("text", a2="142"))
+
+        self.assertEqual(result, "legacy")
+
+
+class CountingGoogleMapClientMock:
+    def __init__(self):
+        self.calls = 0
+
+    def method(self, a1):
+        self.calls += 1
+        return f"{a1}:{self.calls}"
+
+    async def async_method(self, a1):
+        return self.method(a1)
+
+
+@override_settings(
+    GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem",
+    GOOGLE_PLACES_CACHING_TIMES={"method": 42},
+    GOOGLE_PLACES_STALE_TIME=60,
+)
+class CacheableWrapperStaleWhileRevalidateTests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.inner_client = CountingGoogleMapClientMock()
+        self.client = CacheableWrapper(self.inner_client)
+
+    def expire(self, name):
+        make_stale(self.client.make_key(name, ("text",), {}))
+
+    def test_single_entry_with_stale_time(self):
+        with patch.object(caches["locmem"], "set") as cache_mock:
+            self.client.method("text")
+
+        key = self.client.make_key("method", ("text",), {})
+        [(args, _)] = cache_mock.call_args_list
+        self.assertEqual(args[0], key)
+        self.assertEqual(args[2], 42 + 60)
+        serialized, fresh_until = self.client._unpack(args[1])
+        self.assertEqual(serialized, self.client.serializer.dumps("text:1"))
+        self.assertAlmostEqual(fresh_until, time.time() + 42, delta=5)
+
+    @override_settings(CACHING_TIME=7)
+    def test_default_timeout(self):
+        self.assertEqual(self.client.get_timeout("other"), 7)
+        self.assertEqual(self.client.get_timeout("method"), 42)
+
+    def test_serve_stale_and_refresh_in_background(self):
+        self.client.method("text")
+        self.expire("method")
+
+        result = self.client.method("text")
+        self.client._refresh_executor.shutdown(wait=True)
+
+        self.assertEqual(result, "text:1")
+        self.assertEqual(self.inner_client.calls, 2)
+        self.assertEqual(self.client.stats["refreshes"], 1)
+        self.assertEqual(get_cached(self.client, "method", "text"), "text:2")
+
+    def test_async_serve_stale_and_refresh_in_background(self):
+        client = AsyncCacheableWrapper(self.inner_client)
+
+        async def run():
+            await client.async_method("text")
+            self.expire("async_method")
+            result = await client.async_method("text")
+            await asyncio.gather(*client._background_tasks)
+            return result
+
+        self.assertEqual(asyncio.run(run()), "text:1")
+        self.assertEqual(self.inner_client.calls, 2)
+        self.assertEqual(get_cached(client, "async_method", "text"), "text:2")
+
+
+@override_settings(
+    GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem",
+    GOOGLE_PLACES_L1_MAX_ENTRIES=10,
+)
+class CacheableWrapperL1Tests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.inner_client = CountingGoogleMapClientMock()
+        self.client = CacheableWrapper(self.inner_client)
+
+    def test_serve_from_l1(self):
+        self.client.method("text")
+
+        with patch.object(caches["locmem"], "get") as cache_mock:
+            result = self.client.method("text")
+
+        cache_mock.assert_not_called()
+        self.assertEqual(result, "text:1")
+        self.assertEqual(self.client.stats["l1_hits"], 1)
+        self.assertEqual(self.client.stats["misses"], 1)
+
+    def test_fill_l1_from_l2(self):
+        self.client.method("text")
+        other = CacheableWrapper(self.inner_client)
+
+        other.method("text")
+        with patch.object(other.serializer, "decode") as decode_mock:
+            result = other.method("text")
+
+        decode_mock.assert_not_called()
+        self.assertEqual(result, "text:1")
+        self.assertEqual(other.stats["l2_hits"], 1)
+        self.assertEqual(other.stats["l1_hits"], 1)
+
+    def test_negative_error_in_l1(self):
+        client = CacheableWrapper(NegativeGoogleMapClientMock())
+
+        for _ in range(2):
+            with self.assertRaises(ApiErrorMock):
+                client.not_found()
+
+        self.assertEqual(client.stats["l1_hits"], 1)
+
+    def test_error_hits_do_not_grow_traceback(self):
+        client = CacheableWrapper(NegativeGoogleMapClientMock())
+        key = client.make_key("not_found", (), {})
+
+        depths = []
+        for _ in range(3):
+            try:
+                client.not_found()
+            except ApiErrorMock as e:
+                depths.append(len(traceback.extract_tb(e.__traceback__)))
+
+        self.assertEqual(client.stats["l1_hits"], 2)
+        self.assertEqual(depths[1], depths[2])
+        self.assertIsNone(client._l1.get(key).error.__traceback__)
+
+    @override_settings(
+        GOOGLE_PLACES_CACHE_COMPRESSION="zlib",
+        GOOGLE_PLACES_CACHE_COMPRESS_MIN_SIZE=0,
+    )
+    def test_size_uncompressed_payload(self):
+        client = CacheableWrapper(self.inner_client)
+        client.method("text" * 100)
+
+        _, size = client.serializer.encode("text" * 100 + ":1")
+        self.assertEqual(client._l1.size, size)
+        self.assertGreater(
+            size, len(client.serializer.dumps("text" * 100 + ":1"))
+        )
+
+    @override_settings(GOOGLE_PLACES_NEGATIVE_CACHING_TIME=1)
+    def test_negative_result_expires_with_its_timeout(self):
+        client = CacheableWrapper(NegativeGoogleMapClientMock())
+        with self.assertRaises(ApiErrorMock):
+            client.not_found()
+
+        with patch(
+            "places.lru.time.monotonic", return_value=time.monotonic() + 2
+        ):
+            with self.assertRaises(ApiErrorMock):
+                client.not_found()
+
+        self.assertEqual(client.stats["l1_hits"], 0)
+
+    @override_settings(GOOGLE_PLACES_CACHING_TIMES={"method": 1})
+    def test_method_timeout_caps_l1_timeout(self):
+        client = CacheableWrapper(self.inner_client)
+        client.method("text")
+        key = client.make_key("method", ("text",), {})
+
+        with patch(
+            "places.lru.time.monotonic", return_value=time.monotonic() + 2
+        ):
+            self.assertNotIn(key, client._l1)
+
+    @override_settings(GOOGLE_PLACES_L1_MAX_ENTRIES=0)
+    def test_disabled(self):
+        client = CacheableWrapper(self.inner_client)
+        client.method("text")
+
+        client.method("text")
+
+        self.assertEqual(client.stats["l1_hits"], 0)
+        self.assertEqual(client.stats["l2_hits"], 1)
+
+
+class ApiErrorMock(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class NegativeGoogleMapClientMock:
+    def __init__(self):
+        self.calls = 0
+
+    def find_place(self, input):
+        self.calls += 1
+        return {"status": "ZERO_RESULTS", "candidates": []}
+
+    def empty(self):
+        self.calls += 1
+        return []
+
+    def not_found(self):
+        self.calls += 1
+        raise ApiErrorMock("NOT_FOUND")
+
+    def over_query_limit(self):
+        self.calls += 1
+        raise ApiErrorMock("OVER_QUERY_LIMIT")
+
+
+@override_settings(
+    GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem",
+    GOOGLE_PLACES_NEGATIVE_CACHING_TIME=42,
+)
+class CacheableWrapperNegativeCachingTests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.inner_client = NegativeGoogleMapClientMock()
+        self.client = CacheableWrapper(self.inner_client)
+
+    def test_negative_status_timeout(self):
+        with patch.object(caches["locmem"], "set") as cache_mock:
+            self.client.find_place("garbage")
+
+        self.assertEqual(cache_mock.call_args[0][2], 42)
+
+    def test_empty_result_is_a_hit(self):
+        self.assertEqual(self.client.empty(), [])
+        self.assertEqual(self.client.empty(), [])
+
+        self.assertEqual(self.inner_client.calls, 1)
+
+    def test_negative_error_is_cached(self):
+        for _ in range(2):
+            with self.assertRaises(ApiErrorMock):
+                self.client.not_found()
+
+        self.assertEqual(self.inner_client.calls, 1)
+
+    def test_other_error_is_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(ApiErrorMock):
+                self.client.over_query_limit()
+
+        self.assertEqual(self.inner_client.calls, 2)
+
+    def test_async_negative_error_is_cached(self):
+        client = AsyncCacheableWrapper(self.inner_client)
+
+        for _ in range(2):
+            with self.assertRaises(ApiErrorMock):
+                asyncio.run(client.not_found())
+
+        self.assertEqual(self.inner_client.calls, 1)
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class CacheableWrapperCallManyTests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.inner_client = CountingGoogleMapClientMock()
+        self.client = CacheableWrapper(self.inner_client)
+
+    def test_results_in_call_order(self):
+        self.client.method("b")
+
+        results = self.client.call_many(
+            "method", [(("a",), {}), (("b",), {}), ((), {"a1": "c"})]
+        )
+
+        self.assertEqual(results, ["a:2", "b:1", "c:3"])
+
+    def test_single_cache_read_and_write(self):
+        cache = caches["locmem"]
+        with patch.object(cache, "get_many", return_value={}) as get_mock:
+            with patch.object(cache, "set_many") as set_mock:
+                self.client.call_many("method", [(("a",), {}), (("b",), {})])
+
+        get_mock.assert_called_once()
+        set_mock.assert_called_once()
+        self.assertEqual(len(set_mock.call_args[0][0]), 2)
+
+    def test_cached_results_are_reused(self):
+        self.client.call_many("method", [(("a",), {}), (("b",), {})])
+
+        results = self.client.call_many("method", [(("b",), {})])
+
+        self.assertEqual(results, ["b:2"])
+        self.assertEqual(self.inner_client.calls, 2)
+        self.assertEqual(self.client.method("a"), "a:1")
+
+    def test_duplicate_calls_are_called_once(self):
+        results = self.client.call_many("method", [(("a",), {})] * 3)
+
+        self.assertEqual(results, ["a:1"] * 3)
+        self.assertEqual(self.inner_client.calls, 1)
+
+    def test_concurrent_misses(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        class Client:
+            def method(self, a1):
+                barrier.wait()
+                return a1
+
+        executor = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(executor.shutdown)
+
+        results = CacheableWrapper(Client()).call_many(
+            "method", [(("a",), {}), (("b",), {}), (("c",), {})], executor
+        )
+
+        self.assertEqual(results, ["a", "b", "c"])
+
+    def test_raise_first_error(self):
+        client = CacheableWrapper(NegativeGoogleMapClientMock())
+
+        with self.assertRaises(ApiErrorMock):
+            client.call_many("over_query_limit", [((), {})])
+
+    def test_return_exceptions(self):
+        client = CacheableWrapper(NegativeGoogleMapClientMock())
+
+        results = client.call_many(
+            "not_found", [((), {})], return_exceptions=True
+        )
+        self.assertIsInstance(results[0], ApiErrorMock)
+        results = client.call_many(
+            "not_found", [((), {})], return_exceptions=True
+        )
+
+        self.assertIsInstance(results[0], ApiErrorMock)
+        self.assertEqual(client._client.calls, 1)
+
+    @override_settings(GOOGLE_PLACES_STALE_TIME=60)
+    def test_serve_stale(self):
+        client = CacheableWrapper(self.inner_client)
+        client.method("a")
+        make_stale(client.make_key("method", ("a",), {}))
+
+        results = client.call_many("method", [(("a",), {})])
+        client._refresh_executor.shutdown(wait=True)
+
+        self.assertEqual(results, ["a:1"])
+        self.assertEqual(get_cached(client, "method", "a"), "a:2")
+
+    def test_async(self):
+        client = AsyncCacheableWrapper(self.inner_client)
+
+        results = asyncio.run(
+            client.acall_many(
+                "async_method", [(("a",), {}), (("a",), {}), (("b",), {})]
+            )
+        )
+
+        self.assertEqual(results, ["a:1", "a:1", "b:2"])
+        self.assertEqual(
+            asyncio.run(client.acall_many("async_method", [(("a",), {})])),
+            ["a:1"],
+        )
+
+
+class AsyncGoogleMapClientMock(GoogleMapClientMock):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def async_method(self, a1, a2):
+        self.calls += 1
+        return [a1, a2]
+
+
+@override_settings(GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem")
+class AsyncCacheableWrapperTests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.inner_client = AsyncGoogleMapClientMock()
+        self.client = AsyncCacheableWrapper(self.inner_client)
+
+    def test_call_inner_client_coroutine_method(self):
+        result = asyncio.run(self.client.async_method("text", a2="142"))
+
+        self.assertEqual(result, ["text", "142"])
+
+    def test_call_inner_client_blocking_method(self):
+        result = asyncio.run(self.client.inst_method_with_args("text", "1"))
+
+        self.assertEqual(result, "result")
+
+    def test_get_inner_client_instance_existing_attr(self):
+        self.assertEqual(self.client.inst_attr, self.inner_client.inst_attr)
+
+    def test_call_inner_client_non_existent_method(self):
+        with self.assertRaises(AttributeError):
+            self.client.non_existent_method("text", a2="142")
+
+    def test_cached_result_is_reused(self):
+        async def call_twice():
+            await self.client.async_method("text", a2="142")
+            return await self.client.async_method("text", a2="142")
+
+        result = asyncio.run(call_twice())
+
+        self.assertEqual(result, ["text", "142"])
+        self.assertEqual(self.inner_client.calls, 1)
+
+    def test_shares_cache_with_sync_wrapper(self):
+        asyncio.run(self.client.async_method("text", a2="142"))
+
+        result = get_cached(
+            CacheableWrapper(self.inner_client),
+            "async_method",
+            "text",
+            a2="142",
+        )
+
+        self.assertEqual(result, ["text", "142"])
+
+
+class SlowGoogleMapClientMock:
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def slow_method(self, a1):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return a1
+
+
+class FailingOnceGoogleMapClientMock:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def flaky_method(self, a1):
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            self.started.set()
+            self.release.wait(5)
+            raise RuntimeError("timeout")
+        return a1
+
+
+@override_settings(
+    GOOGLE_PLACES_WRAPPER_CACHE_NAME="locmem",
+    GOOGLE_PLACES_LOCK_POLL_INTERVAL=0.01,
+)
+class CacheableWrapperSingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.inner_client = SlowGoogleMapClientMock()
+
+    def call_in_thread(self, client, results):
+        thread = threading.Thread(
+            target=lambda: results.append(client.slow_method("text"))
+        )
+        thread.start()
+        return thread
+
+    def test_coalesce_concurrent_misses(self):
+        client = CacheableWrapper(self.inner_client)
+        results = []
+        first = self.call_in_thread(client, results)
+        self.inner_client.started.wait(5)
+        second = self.call_in_thread(client, results)
+
+        self.inner_client.release.set()
+        first.join()
+        second.join()
+
+        self.assertEqual(results, ["text", "text"])
+        self.assertEqual(self.inner_client.calls, 1)
+        self.assertEqual(client.stats["coalesced"], 1)
+
+    @override_settings(GOOGLE_PLACES_STALE_TIME=60)
+    def test_serve_stale_result_while_locked(self):
+        client = CacheableWrapper(self.inner_client)
+        key = client.make_key("slow_method", ("text",), {})
+        make_stale(key, pickle.dumps("stale"))
+        caches["locmem"].add(f"{key}::lock", 1)
+
+        result = client.slow_method("text")
+
+        self.assertEqual(result, "stale")
+        self.assertEqual(self.inner_client.calls, 0)
+        self.assertEqual(client.stats["stale"], 1)
+
+    @override_settings(GOOGLE_PLACES_LOCK_WAIT=0.05)
+    def test_call_client_after_lock_wait(self):
+        client = CacheableWrapper(self.inner_client)
+        key = client.make_key("slow_method", ("text",), {})
+        caches["locmem"].add(f"{key}::lock", 1)
+        self.inner_client.release.set()
+
+        result = client.slow_method("text")
+
+        self.assertEqual(result, "text")
+        self.assertEqual(self.inner_client.calls, 1)
+        self.assertEqual(client.stats["lock_timeouts"], 1)
+
+    @override_settings(GOOGLE_PLACES_LOCK_WAIT=2)
+    def test_take_over_lock_of_failed_call(self):
+        inner_client = FailingOnceGoogleMapClientMock()
+        client = CacheableWrapper(inner_client)
+        results, errors = [], []
+
+        def call():
+            try:
+                results.append(client.flaky_method("text"))
+            except RuntimeError as e:
+                errors.append(e)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=call)]
+        threads[0].start()
+        inner_client.started.wait(5)
+        threads += [threading.Thread(target=call) for _ in range(2)]
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        inner_client.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, ["text", "text"])
+        self.assertEqual(inner_client.calls, 2)
+        self.assertEqual(client.stats["lock_retries"], 1)
+        self.assertLess(time.monotonic() - started, 1)
+
+    @override_settings(GOOGLE_PLACES_LOCK_WAIT=2)
+    def test_async_take_over_released_lock(self):
+        client = AsyncCacheableWrapper(self.inner_client)
+        lock_key = f"{client.make_key('slow_method', ('text',), {})}::lock"
+        caches["locmem"].add(lock_key, 1)
+        self.inner_client.release.set()
+
+        async def call():
+            asyncio.get_running_loop().call_later(
+                0.05, caches["locmem"].delete, lock_key
+            )
+            return await client.slow_method("text")
+
+        started = time.monotonic()
+        result = asyncio.run(call())
+
+        self.assertEqual(result, "text")
+        self.assertEqual(self.inner_client.calls, 1)
+        self.assertEqual(client.stats["lock_retries"], 1)
+        self.assertEqual(client.stats["lock_timeouts"], 0)
+        self.assertLess(time.monotonic() - started, 1)
+
+    @override_settings(GOOGLE_PLACES_LOCK_TIMEOUT=0)
+    def test_disabled(self):
+        client = CacheableWrapper(self.inner_client)
+        key = client.make_key("slow_method", ("text",), {})
+        caches["locmem"].add(f"{key}::lock", 1)
+        self.inner_client.release.set()
+
+        client.slow_method("text")
+
+        self.assertEqual(self.inner_client.calls, 1)
+        self.assertEqual(client.stats["coalesced"], 0)
+
+    @override_settings(GOOGLE_PLACES_STALE_TIME=60)
+    def test_async_serve_stale_result_while_locked(self):
+        client = AsyncCacheableWrapper(self.inner_client)
+        key = client.make_key("slow_method", ("text",), {})
+        make_stale(key, pickle.dumps("stale"))
+        caches["locmem"].add(f"{key}::lock", 1)
+
+        result = asyncio.run(client.slow_method("text"))
+
+        self.assertEqual(result, "stale")
+        self.assertEqual(client.stats["coalesced"], 1)
@@ -1,33 +1,863 @@
-import pickle
+import asyncio
+import copy
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import struct
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Iterable, Tuple
 
 from django.conf import settings
 from django.core.cache import caches
 
+from places.codecs import Serializer
+from places.lru import MISSING, LRUCache
+from places.metrics import get_metrics_backend
+
+logger = logging.getLogger(__name__)
+
+KEY_VERSION = 1
+
+# Values written with GOOGLE_PLACES_STALE_TIME start with this byte, which
+# no codec header uses, and the time until which they are fresh.
+STALE_HEADER = b"\xfe"
+FRESH_UNTIL = struct.Struct("!d")
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return repr(value)
+
+
+def canonical_dumps(value) -> str:
+    """
+    Serialize call arguments so that equal values give equal strings:
+    dicts are sorted, tuples and lists are the same, sets are ordered.
+    """
+    try:
+        return json.dumps(
+            value,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=_json_default,
+        )
+    except TypeError:  # Non-string dict keys
+        return repr(value)
+
+
+def bind_arguments(signature: inspect.Signature or None, args, kwargs):
+    """
+    Map call arguments to parameter names, leaving out the ones that
+    equal their default or are None. Calls that do not fit the signature
+    are returned as ``[args, kwargs]``.
+    """
+    if signature is None:
+        return [args, kwargs]
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:  # The call itself will raise
+        return [args, kwargs]
+
+    arguments = {}
+    for param_name, value in bound.arguments.items():
+        param = signature.parameters[param_name]
+        if param.kind is param.VAR_KEYWORD:
+            arguments.update((k, v) for k, v in value.items() if v is not None)
+        elif value is not None and value != param.default:
+            arguments[param_name] = value
+    return arguments
+
+
+class CachedError:
+    """
+    Negative cache entry for a call that raised, re-raised on a hit.
+
+    It keeps a copy of the error without its traceback and hands out a
+    fresh copy on every hit, so raising it does not grow a shared
+    traceback.
+    """
+
+    def __init__(self, error: Exception):
+        self.error = copy.copy(error)
+
+    def get_error(self) -> Exception:
+        return copy.copy(self.error)
+
 
 class CacheableWrapper:
+    """
+    Cache the results of the client methods.
+
+    Cache keys are built from the canonical form of the call: arguments
+    are bound to the method signature, defaults and None values dropped,
+    kwargs sorted and the result hashed to a fixed length under a
+    versioned GOOGLE_PLACES_CACHE_KEY_PREFIX namespace. While
+    GOOGLE_PLACES_CACHE_KEY_COMPAT is on, misses fall back to the legacy
+    repr-based keys so entries written before the switch are reused.
+
+    Empty results and responses or errors with a status listed in
+    GOOGLE_PLACES_NEGATIVE_STATUSES are negatively cached for
+    GOOGLE_PLACES_NEGATIVE_CACHING_TIME seconds instead of CACHING_TIME.
+
+    Results are kept for GOOGLE_PLACES_CACHING_TIMES[method_name] seconds,
+    CACHING_TIME for the methods not listed there.
+
+    Values are encoded with the GOOGLE_PLACES_CACHE_CODEC codec and the
+    ones of at least GOOGLE_PLACES_CACHE_COMPRESS_MIN_SIZE bytes are
+    compressed with GOOGLE_PLACES_CACHE_COMPRESSION, see places.codecs.
+
+    With GOOGLE_PLACES_L1_MAX_ENTRIES set, deserialized results are also
+    kept in a per-process LRU cache in front of the Django cache, bounded
+    by GOOGLE_PLACES_L1_MAX_BYTES of serialized size and expiring after
+    GOOGLE_PLACES_L1_TIMEOUT seconds. Results served from it are shared
+    between callers and must not be mutated.
+
+    Concurrent misses of the same key are coalesced: the caller that wins
+    the ``cache.add`` lock calls the client, the others wait up to
+    GOOGLE_PLACES_LOCK_WAIT seconds for its result. With
+    GOOGLE_PLACES_STALE_TIME set, entries are kept that long past their
+    timeout, which is recorded in the value, and expired ones are served
+    at once while the lock winner refreshes them in the background.
+
+    Hits, misses, client latency and errors and the size of the written
+    values are reported to the GOOGLE_PLACES_METRICS_BACKEND backend, see
+    places.metrics.
+    """
+
     def __init__(self, client):
         self._client = client
         self._cache = caches[settings.GOOGLE_PLACES_WRAPPER_CACHE_NAME]
+        self.lock_timeout = getattr(settings, "GOOGLE_PLACES_LOCK_TIMEOUT", 10)
+        self.lock_wait = getattr(settings, "GOOGLE_PLACES_LOCK_WAIT", 5)
+        self.lock_poll_interval = getattr(
+            settings, "GOOGLE_PLACES_LOCK_POLL_INTERVAL", 0.05
+        )
+        self.stale_time = getattr(settings, "GOOGLE_PLACES_STALE_TIME", 0)
+        self.key_prefix = getattr(
+            settings, "GOOGLE_PLACES_CACHE_KEY_PREFIX", "places"
+        )
+        self.key_compat = getattr(
+            settings, "GOOGLE_PLACES_CACHE_KEY_COMPAT", False
+        )
+        self.negative_timeout = getattr(
+            settings, "GOOGLE_PLACES_NEGATIVE_CACHING_TIME", 60 * 60
+        )
+        self.negative_statuses = frozenset(
+            getattr(
+                settings,
+                "GOOGLE_PLACES_NEGATIVE_STATUSES",
+                ("ZERO_RESULTS", "NOT_FOUND"),
+            )
+        )
+        self.timeouts = getattr(settings, "GOOGLE_PLACES_CACHING_TIMES", {})
+        self.refresh_workers = getattr(
+            settings, "GOOGLE_PLACES_REFRESH_WORKERS", 2
+        )
+        self.serializer = Serializer(
+            getattr(settings, "GOOGLE_PLACES_CACHE_CODEC", "pickle"),
+            getattr(settings, "GOOGLE_PLACES_CACHE_COMPRESSION", None),
+            getattr(settings, "GOOGLE_PLACES_CACHE_COMPRESS_MIN_SIZE", 1024),
+        )
+        self._l1 = None
+        l1_max_entries = getattr(settings, "GOOGLE_PLACES_L1_MAX_ENTRIES", 0)
+        if l1_max_entries:
+            self._l1 = LRUCache(
+                l1_max_entries,
+                getattr(settings, "GOOGLE_PLACES_L1_MAX_BYTES", 16 * 2**20),
+                getattr(settings, "GOOGLE_PLACES_L1_TIMEOUT", 60),
+            )
+        self.stats = Counter()
+        self.metrics = get_metrics_backend()
+        self._stats_lock = threading.Lock()
+        self._signatures = {}
+        self._refresh_executor = None
+        self._background_tasks = set()
 
     def __getattr__(self, name):
         attr = getattr(self._client, name)
-        is_callable = callable(attr)
+        if not callable(attr):
+            return attr
 
         def handler(*args, **kwargs):
-            cache_key = f"{name}::{args}::{kwargs}"
+            cache_key = self.make_key(name, args, kwargs)
+            local_result = self._get_local(cache_key, name)
+            if local_result is not MISSING:
+                return self._unwrap(local_result)
+
             cached_result = self._cache.get(cache_key)
+            if cached_result is None and self.key_compat:
+                cached_result = self._get_legacy(cache_key, name, args, kwargs)
+
+            stale_result = None
+            if cached_result is not None:
+                cached_result, fresh_until = self._unpack(cached_result)
+                if self._is_fresh(fresh_until):
+                    self.incr("l2_hits", method=name)
+                    return self._load(
+                        cached_result, cache_key, name, fresh_until
+                    )
+                stale_result = cached_result
+            self.incr("misses", method=name)
+            return self._fetch(
+                cache_key, name, attr, args, kwargs, stale_result
+            )
 
-            if cached_result:
-                result = pickle.loads(cached_result)
+        return handler
+
+    def _get_legacy(self, cache_key: str, name: str, args: tuple, kwargs):
+        cached_result = self._cache.get(
+            self.make_legacy_key(name, args, kwargs)
+        )
+        if cached_result is not None:
+            self.incr("legacy_hits", method=name)
+            self._cache.set(cache_key, cached_result, self.get_timeout(name))
+        return cached_result
+
+    def _fetch(
+        self,
+        cache_key: str,
+        name: str,
+        func,
+        args,
+        kwargs,
+        stale_result: bytes = None,
+    ):
+        lock_key = f"{cache_key}::lock"
+        locked = self._try_lock(cache_key)
+
+        if stale_result is not None:
+            self.incr("stale", method=name)
+            if locked:
+                self._get_refresh_executor().submit(
+                    self._refresh, cache_key, name, func, args, kwargs
+                )
             else:
-                result = attr
-                if is_callable:
-                    result = result(*args, **kwargs)
-                    pickled_object = pickle.dumps(result)
-                    self._cache.set(
-                        cache_key, pickled_object, settings.CACHING_TIME
+                self.incr("coalesced", method=name)
+            return self._load(stale_result)
+
+        if locked:
+            return self._call_locked(cache_key, name, func, args, kwargs)
+
+        self.incr("coalesced", method=name)
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            found = self._cache.get_many([cache_key, lock_key])
+            if cache_key in found:
+                cached_result, fresh_until = self._unpack(found[cache_key])
+                return self._load(cached_result, cache_key, name, fresh_until)
+            # The lock is gone without a result: the winner failed. Only
+            # the waiter taking the lock over calls the client again.
+            if lock_key not in found and self._try_lock(cache_key):
+                self.incr("lock_retries", method=name)
+                return self._call_locked(cache_key, name, func, args, kwargs)
+
+        self.incr("lock_timeouts", method=name)
+        return self._call(cache_key, name, func, args, kwargs)
+
+    def _try_lock(self, cache_key: str) -> bool:
+        if not self.lock_timeout:
+            return True
+        return self._cache.add(f"{cache_key}::lock", 1, self.lock_timeout)
+
+    def _call_locked(self, cache_key: str, name: str, func, args, kwargs):
+        try:
+            return self._call(cache_key, name, func, args, kwargs)
+        finally:
+            if self.lock_timeout:
+                self._cache.delete(f"{cache_key}::lock")
+
+    def _call(self, cache_key: str, name: str, func, args, kwargs):
+        try:
+            result = self._call_client(name, func, args, kwargs)
+        except Exception as e:
+            if self.is_negative(e):
+                self._write(cache_key, name, CachedError(e))
+            raise
+
+        self._write(cache_key, name, result)
+        return result
+
+    def _call_client(self, name: str, func, args: tuple, kwargs: dict):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record_call(name, started, e)
+            raise
+        self._record_call(name, started)
+        return result
+
+    def _call_safely(self, name: str, func, args: tuple, kwargs: dict):
+        try:
+            return self._call_client(name, func, args, kwargs)
+        except Exception as e:
+            return CachedError(e)
+
+    def _record_call(self, name: str, started: float, error=None):
+        """
+        Report the latency of a client call and its error, if it failed.
+        """
+        tags = {"method": name}
+        self.metrics.timing("api.latency", time.perf_counter() - started, tags)
+        if error is not None:
+            status = getattr(error, "status", None) or type(error).__name__
+            self.metrics.incr("api.errors", 1, {**tags, "status": status})
+
+    def _write(self, cache_key: str, name: str, result):
+        value, timeout, size = self._make_entry(name, result)
+        self._cache.set(cache_key, value, timeout)
+        self._set_local(cache_key, name, result, size)
+
+    def _refresh(self, cache_key: str, name: str, func, args, kwargs):
+        try:
+            self._call(cache_key, name, func, args, kwargs)
+            self.incr("refreshes", method=name)
+        except Exception:
+            logger.exception("Background refresh of %s failed", cache_key)
+        finally:
+            if self.lock_timeout:
+                self._cache.delete(f"{cache_key}::lock")
+
+    def _get_refresh_executor(self) -> ThreadPoolExecutor:
+        with self._stats_lock:
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix="places-refresh",
+                )
+            return self._refresh_executor
+
+    def _make_entry(self, name: str, result) -> Tuple[bytes, int, int]:
+        """
+        Return the cache value storing a result, its timeout and the
+        uncompressed size of the result.
+
+        With GOOGLE_PLACES_STALE_TIME the value records when it turns
+        stale and is kept stale_time longer.
+        """
+        serialized, size = self.serializer.encode(result)
+        self.metrics.histogram(
+            "cache.value_bytes", len(serialized), {"method": name}
+        )
+        if self.is_negative(result):
+            return serialized, self.negative_timeout, size
+
+        timeout = self.get_timeout(name)
+        if self.stale_time and timeout is not None:
+            fresh_until = FRESH_UNTIL.pack(time.time() + timeout)
+            return (
+                STALE_HEADER + fresh_until + serialized,
+                timeout + self.stale_time,
+                size,
+            )
+        return serialized, timeout, size
+
+    @staticmethod
+    def _unpack(value: bytes) -> Tuple[bytes, float or None]:
+        """
+        Return the serialized result held in a cache value and the time
+        until which it is fresh, None if the value does not record it.
+        """
+        if value[:1] != STALE_HEADER:
+            return value, None
+        (fresh_until,) = FRESH_UNTIL.unpack_from(value, 1)
+        return value[1 + FRESH_UNTIL.size :], fresh_until
+
+    @staticmethod
+    def _is_fresh(fresh_until: float or None) -> bool:
+        return fresh_until is None or time.time() < fresh_until
+
+    def get_timeout(self, name: str) -> int or None:
+        return self.timeouts.get(name, settings.CACHING_TIME)
+
+    def is_negative(self, result) -> bool:
+        """
+        Tell whether a result (or raised error) is a "known bad" answer
+        that is cached for GOOGLE_PLACES_NEGATIVE_CACHING_TIME only.
+        """
+        if isinstance(result, CachedError):
+            result = result.error
+        if isinstance(result, Exception):
+            return getattr(result, "status", None) in self.negative_statuses
+        if isinstance(result, dict) and "status" in result:
+            return result["status"] in self.negative_statuses
+        return not result
+
+    def _get_local(self, cache_key: str, name: str):
+        if self._l1 is None:
+            return MISSING
+        result = self._l1.get(cache_key)
+        if result is not MISSING:
+            self.incr("l1_hits", method=name)
+        return result
+
+    def _set_local(
+        self,
+        cache_key: str,
+        name: str,
+        result,
+        size: int,
+        fresh_until: float = None,
+    ):
+        """
+        Keep a result in the in-process cache, sized by its uncompressed
+        serialized size, for GOOGLE_PLACES_L1_TIMEOUT seconds at most and
+        no longer than the result is fresh in the cache.
+        """
+        if self._l1 is None:
+            return
+        timeout = self._l1.timeout
+        if fresh_until is not None:
+            ttl = fresh_until - time.time()
+        elif self.is_negative(result):
+            ttl = self.negative_timeout
+        else:
+            ttl = self.get_timeout(name)
+        if ttl is not None:
+            timeout = ttl if timeout is None else min(timeout, ttl)
+        self._l1.set(cache_key, result, size, timeout)
+
+    def _load(
+        self,
+        cached_result: bytes,
+        cache_key: str = None,
+        name: str = None,
+        fresh_until: float = None,
+    ):
+        return self._unwrap(
+            self._load_raw(cached_result, cache_key, name, fresh_until)
+        )
+
+    def _load_raw(
+        self,
+        cached_result: bytes,
+        cache_key: str = None,
+        name: str = None,
+        fresh_until: float = None,
+    ):
+        """
+        Deserialize a cached value, keeping it in the in-process cache
+        when it was read from the cache under ``cache_key``.
+        """
+        result, size = self.serializer.decode(cached_result)
+        if cache_key is not None:
+            self._set_local(cache_key, name, result, size, fresh_until)
+        return result
+
+    @staticmethod
+    def _unwrap(result):
+        if isinstance(result, CachedError):
+            raise result.get_error()
+        return result
+
+    def incr(self, name: str, value: int = 1, method: str = None):
+        with self._stats_lock:
+            self.stats[name] += value
+        self.metrics.incr(
+            f"cache.{name}", value, {"method": method} if method else None
+        )
+
+    def make_key(self, name: str, args: tuple, kwargs: dict) -> str:
+        arguments = self._bind(name, args, kwargs)
+        digest = hashlib.blake2b(
+            canonical_dumps(arguments).encode(), digest_size=20
+        ).hexdigest()
+        return f"{self.key_prefix}:{KEY_VERSION}:{name}:{digest}"
+
+    @staticmethod
+    def make_legacy_key(name: str, args: tuple, kwargs: dict) -> str:
+        return f"{name}::{args}::{kwargs}"
+
+    def _bind(self, name: str, args: tuple, kwargs: dict):
+        """
+        Map the call arguments to parameter names, leaving out the ones
+        that equal their default or are None.
+        """
+        if name not in self._signatures:
+            try:
+                signature = inspect.signature(getattr(self._client, name))
+            except (TypeError, ValueError):
+                signature = None
+            self._signatures[name] = signature
+
+        return bind_arguments(self._signatures[name], args, kwargs)
+
+    def call_many(
+        self,
+        name: str,
+        calls: Iterable[Tuple[tuple, dict]],
+        executor: Executor = None,
+        return_exceptions: bool = False,
+    ) -> list:
+        """
+        Call the client method ``name`` once per (args, kwargs) pair and
+        return the results in the same order.
+
+        All keys are read with one ``get_many`` and the misses, called one
+        after another or concurrently on ``executor``, are written back
+        with ``set_many``. Unlike single calls, misses are not coalesced
+        with other processes. With ``return_exceptions`` errors are
+        returned in place of results instead of raising the first one.
+        """
+        func = getattr(self._client, name)
+        calls = [(tuple(args), dict(kwargs)) for args, kwargs in calls]
+        results, pending = self._get_many_local(name, calls)
+
+        if pending:
+            cached = self._cache.get_many(list(pending))
+            if self.key_compat:
+                legacy = self._many_legacy_keys(name, calls, pending, cached)
+                if legacy:
+                    found = self._cache.get_many(legacy)
+                    self._set_many(
+                        self._many_copy_legacy(name, legacy, found, cached)
                     )
+            misses, stale = self._apply_cached(name, results, pending, cached)
+            for cache_key in stale:
+                if self._try_lock(cache_key):
+                    args, kwargs = calls[pending[cache_key][0]]
+                    self._get_refresh_executor().submit(
+                        self._refresh, cache_key, name, func, args, kwargs
+                    )
+
+            if misses:
+                miss_calls = [calls[misses[key][0]] for key in misses]
+                if executor is None or len(miss_calls) == 1:
+                    fetched = [
+                        self._call_safely(name, func, args, kwargs)
+                        for args, kwargs in miss_calls
+                    ]
+                else:
+                    fetched = list(
+                        executor.map(
+                            lambda call: self._call_safely(name, func, *call),
+                            miss_calls,
+                        )
+                    )
+                self._set_many(
+                    self._apply_fetched(name, results, misses, fetched)
+                )
+
+        return self._many_results(results, return_exceptions)
+
+    def _get_many_local(self, name: str, calls: list):
+        """
+        Return the results list filled from the in-process cache and the
+        remaining cache keys mapped to the indexes of their calls.
+        """
+        results = [MISSING] * len(calls)
+        pending = {}
+        for index, (args, kwargs) in enumerate(calls):
+            cache_key = self.make_key(name, args, kwargs)
+            local_result = self._get_local(cache_key, name)
+            if local_result is MISSING:
+                pending.setdefault(cache_key, []).append(index)
+            else:
+                results[index] = local_result
+        return results, pending
+
+    def _many_legacy_keys(self, name, calls, pending, cached) -> dict:
+        return {
+            self.make_legacy_key(name, *calls[indexes[0]]): cache_key
+            for cache_key, indexes in pending.items()
+            if cache_key not in cached
+        }
+
+    def _many_copy_legacy(self, name, legacy, found, cached) -> dict:
+        writes = {}
+        for legacy_key, cached_result in found.items():
+            self.incr("legacy_hits", method=name)
+            cache_key = legacy[legacy_key]
+            cached[cache_key] = cached_result
+            timeout = self.get_timeout(name)
+            writes.setdefault(timeout, {})[cache_key] = cached_result
+        return writes
+
+    def _apply_cached(
+        self, name: str, results: list, pending: dict, cached: dict
+    ):
+        """
+        Fill the results read from the cache. Return the keys that missed
+        mapped to their indexes, and the keys served from a stale copy.
+        """
+        misses = {}
+        stale = []
+        for cache_key, indexes in pending.items():
+            if cache_key not in cached:
+                self.incr("misses", method=name)
+                misses[cache_key] = indexes
+                continue
+            cached_result, fresh_until = self._unpack(cached[cache_key])
+            if self._is_fresh(fresh_until):
+                self.incr("l2_hits", method=name)
+                result = self._load_raw(
+                    cached_result, cache_key, name, fresh_until
+                )
+            else:
+                self.incr("stale", method=name)
+                stale.append(cache_key)
+                result = self._load_raw(cached_result)
+            for index in indexes:
+                results[index] = result
+        return misses, stale
+
+    def _apply_fetched(
+        self, name: str, results: list, misses: dict, fetched: list
+    ) -> dict:
+        """
+        Fill the results of the client calls and return the cache writes
+        grouped by timeout.
+        """
+        writes = {}
+        for (cache_key, indexes), result in zip(misses.items(), fetched):
+            for index in indexes:
+                results[index] = result
+            if isinstance(result, CachedError) and not self.is_negative(
+                result
+            ):
+                continue
+            value, timeout, size = self._make_entry(name, result)
+            writes.setdefault(timeout, {})[cache_key] = value
+            self._set_local(cache_key, name, result, size)
+        return writes
+
+    def _set_many(self, writes: dict):
+        for timeout, data in writes.items():
+            self._cache.set_many(data, timeout)
+
+    @staticmethod
+    def _many_results(results: list, return_exceptions: bool) -> list:
+        if return_exceptions:
+            return [
+                r.get_error() if isinstance(r, CachedError) else r
+                for r in results
+            ]
+        for result in results:
+            if isinstance(result, CachedError):
+                raise result.get_error()
+        return results
+
+
+class AsyncCacheableWrapper(CacheableWrapper):
+    """
+    Asyncio flavour of CacheableWrapper built on the async cache API.
+
+    Coroutine methods of the client are awaited, blocking ones are run in
+    the default executor, so both googlemaps.Client and native async
+    clients can be wrapped.
+    """
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        async def handler(*args, **kwargs):
+            cache_key = self.make_key(name, args, kwargs)
+            local_result = self._get_local(cache_key, name)
+            if local_result is not MISSING:
+                return self._unwrap(local_result)
+
+            cached_result = await self._cache.aget(cache_key)
+            if cached_result is None and self.key_compat:
+                cached_result = await self._aget_legacy(
+                    cache_key, name, args, kwargs
+                )
+
+            stale_result = None
+            if cached_result is not None:
+                cached_result, fresh_until = self._unpack(cached_result)
+                if self._is_fresh(fresh_until):
+                    self.incr("l2_hits", method=name)
+                    return self._load(
+                        cached_result, cache_key, name, fresh_until
+                    )
+                stale_result = cached_result
+            self.incr("misses", method=name)
+            return await self._afetch(
+                cache_key, name, attr, args, kwargs, stale_result
+            )
+
+        return handler
+
+    async def _aget_legacy(self, cache_key: str, name: str, args, kwargs):
+        cached_result = await self._cache.aget(
+            self.make_legacy_key(name, args, kwargs)
+        )
+        if cached_result is not None:
+            self.incr("legacy_hits", method=name)
+            await self._cache.aset(
+                cache_key, cached_result, self.get_timeout(name)
+            )
+        return cached_result
+
+    async def _afetch(
+        self,
+        cache_key: str,
+        name: str,
+        func,
+        args,
+        kwargs,
+        stale_result: bytes = None,
+    ):
+        lock_key = f"{cache_key}::lock"
+        locked = await self._atry_lock(cache_key)
+
+        if stale_result is not None:
+            self.incr("stale", method=name)
+            if locked:
+                self._schedule_refresh(cache_key, name, func, args, kwargs)
+            else:
+                self.incr("coalesced", method=name)
+            return self._load(stale_result)
+
+        if locked:
+            return await self._acall_locked(
+                cache_key, name, func, args, kwargs
+            )
+
+        self.incr("coalesced", method=name)
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lock_poll_interval)
+            found = await self._cache.aget_many([cache_key, lock_key])
+            if cache_key in found:
+                cached_result, fresh_until = self._unpack(found[cache_key])
+                return self._load(cached_result, cache_key, name, fresh_until)
+            if lock_key not in found and await self._atry_lock(cache_key):
+                self.incr("lock_retries", method=name)
+                return await self._acall_locked(
+                    cache_key, name, func, args, kwargs
+                )
+
+        self.incr("lock_timeouts", method=name)
+        return await self._acall(cache_key, name, func, args, kwargs)
+
+    @staticmethod
+    async def _invoke(func, args: tuple, kwargs: dict):
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs)
+        )
+
+    async def _acall_client(self, name: str, func, args, kwargs):
+        started = time.perf_counter()
+        try:
+            result = await self._invoke(func, args, kwargs)
+        except Exception as e:
+            self._record_call(name, started, e)
+            raise
+        self._record_call(name, started)
+        return result
+
+    async def _atry_lock(self, cache_key: str) -> bool:
+        if not self.lock_timeout:
+            return True
+        return await self._cache.aadd(
+            f"{cache_key}::lock", 1, self.lock_timeout
+        )
+
+    async def _acall_locked(
+        self, cache_key: str, name: str, func, args, kwargs
+    ):
+        try:
+            return await self._acall(cache_key, name, func, args, kwargs)
+        finally:
+            if self.lock_timeout:
+                await self._cache.adelete(f"{cache_key}::lock")
+
+    async def _acall(self, cache_key: str, name: str, func, args, kwargs):
+        try:
+            result = await self._acall_client(name, func, args, kwargs)
+        except Exception as e:
+            if self.is_negative(e):
+                await self._awrite(cache_key, name, CachedError(e))
+            raise
+
+        await self._awrite(cache_key, name, result)
+        return result
+
+    async def _awrite(self, cache_key: str, name: str, result):
+        value, timeout, size = self._make_entry(name, result)
+        await self._cache.aset(cache_key, value, timeout)
+        self._set_local(cache_key, name, result, size)
+
+    def _schedule_refresh(self, cache_key: str, name: str, func, args, kwargs):
+        task = asyncio.get_running_loop().create_task(
+            self._arefresh(cache_key, name, func, args, kwargs)
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _arefresh(self, cache_key: str, name: str, func, args, kwargs):
+        try:
+            await self._acall(cache_key, name, func, args, kwargs)
+            self.incr("refreshes", method=name)
+        except Exception:
+            logger.exception("Background refresh of %s failed", cache_key)
+        finally:
+            if self.lock_timeout:
+                await self._cache.adelete(f"{cache_key}::lock")
+
+    async def acall_many(
+        self,
+        name: str,
+        calls: Iterable[Tuple[tuple, dict]],
+        return_exceptions: bool = False,
+    ) -> list:
+        """
+        Asyncio flavour of call_many, misses are awaited concurrently.
+        """
+        func = getattr(self._client, name)
+        calls = [(tuple(args), dict(kwargs)) for args, kwargs in calls]
+        results, pending = self._get_many_local(name, calls)
+
+        if pending:
+            cached = await self._cache.aget_many(list(pending))
+            if self.key_compat:
+                legacy = self._many_legacy_keys(name, calls, pending, cached)
+                if legacy:
+                    found = await self._cache.aget_many(legacy)
+                    await self._aset_many(
+                        self._many_copy_legacy(name, legacy, found, cached)
+                    )
+            misses, stale = self._apply_cached(name, results, pending, cached)
+            for cache_key in stale:
+                if await self._atry_lock(cache_key):
+                    args, kwargs = calls[pending[cache_key][0]]
+                    self._schedule_refresh(cache_key, name, func, args, kwargs)
+
+            if misses:
+                fetched = await asyncio.gather(
+                    *(
+                        self._acall_client(name, func, *calls[indexes[0]])
+                        for indexes in misses.values()
+                    ),
+                    return_exceptions=True,
+                )
+                fetched = [
+                    CachedError(r) if isinstance(r, Exception) else r
+                    for r in fetched
+                ]
+                await self._aset_many(
+                    self._apply_fetched(name, results, misses, fetched)
+                )
 
-            return result
+        return self._many_results(results, return_exceptions)
 
-        return handler if is_callable else handler()
+    async def _aset_many(self, writes: dict):
+        for timeout, data in writes.items():
+            await self._cache.aset_many(data, timeout)